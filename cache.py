@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from config import CACHE_DIR
+
+
+class DiskCache:
+    """
+    Content-addressed file cache under CACHE_DIR/<name>.
+
+    Entries are addressed by make_key(...) and evicted least-recently-used
+    first once the directory grows past max_bytes. Files are copied in and
+    out, never hard-linked: callers overwrite their paths in place (ffmpeg -y),
+    which would otherwise rewrite the cached entry too.
+    """
+
+    def __init__(self, name, max_bytes):
+        self.name = name
+        self.root = os.path.join(CACHE_DIR, name)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts):
+        """Stable SHA-256 over JSON-serializable key parts."""
+        payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path_for(self, key, suffix):
+        # Two-level fan-out keeps directories small
+        return os.path.join(self.root, key[:2], key + suffix)
+
+    def get(self, key, suffix=".mp4"):
+        """Returns the cached file path (marking it recently used) or None."""
+        path = self.path_for(key, suffix)
+        with self._lock:
+            if os.path.exists(path):
+                os.utime(path)
+                self.hits += 1
+                return path
+            self.misses += 1
+            return None
+
+    def fetch(self, key, dest_path, suffix=".mp4"):
+        """Places a cached file at dest_path. Returns True on a hit."""
+        path = self.get(key, suffix)
+        if not path:
+            return False
+        try:
+            shutil.copyfile(path, dest_path)
+        except FileNotFoundError:
+            # Evicted between lookup and copy
+            return False
+        return True
+
+    def put(self, key, src_path, suffix=".mp4"):
+        """Stores a copy of src_path under key and returns the cache path."""
+        path = self.path_for(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        shutil.copyfile(src_path, tmp_path)
+        os.replace(tmp_path, path)
+        self._evict()
+        return path
+
+    def put_bytes(self, key, data, suffix):
+        """Stores raw bytes (e.g. JSON metadata) under key."""
+        path = self.path_for(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._evict()
+        return path
+
+    def stats(self):
+        entries, size = 0, 0
+        for _, _, stat in self._entries():
+            entries += 1
+            size += stat.st_size
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+    def _entries(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith(".tmp"):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    yield path, filename, os.stat(path)
+                except FileNotFoundError:
+                    continue
+
+    def _evict(self):
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda e: e[2].st_mtime)
+            total = sum(stat.st_size for _, _, stat in entries)
+            for path, _, stat in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= stat.st_size
+                self.evictions += 1
+
+
+class MemoryCache:
+    """
+    In-memory TTL cache with LRU eviction and single-flight loading:
+    concurrent get_or_load calls for the same key share one loader call.
+    """
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}  # key -> Future
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, loader):
+        """
+        Returns the cached value for key, or calls loader() once and caches
+        its result. None results (failures) are returned but not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._entries[key]
+
+            future = self._inflight.get(key)
+            if future:
+                self.coalesced += 1
+                leader = False
+            else:
+                self.misses += 1
+                future = self._inflight[key] = Future()
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = loader()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            if value is not None:
+                self.set(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+                "in_flight": len(self._inflight),
+            }
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's contents, read in chunks."""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
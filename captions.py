@@ -0,0 +1,152 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+from config import CAPTION_GLYPH_CACHE_BYTES
+
+MAX_SCALED = 4  # caption sizes kept per renderer (one per render profile in practice)
+
+
+class CaptionRenderer:
+    """
+    Word-by-word captions rendered as a single layer.
+
+    Each distinct word is rasterized once with PIL and cached as an RGB
+    bitmap plus alpha mask, which FrameCompositor blends into the frames
+    (MoviePy engine); write_ass emits the same captions for libass
+    (ffmpeg engine). The glyph cache is shared across renders, so it is
+    bounded: least recently used words are dropped past max_bytes.
+    """
+
+    def __init__(self, font_path, font_size=70, color="yellow", stroke_color="black", stroke_width=2,
+                 max_bytes=CAPTION_GLYPH_CACHE_BYTES):
+        self.font_size = font_size
+        self.color = color
+        self.stroke_color = stroke_color
+        self.stroke_width = stroke_width
+        self.font_file, self.font = self._load_font(font_path, font_size)
+        # Absolute path of the resolved font file, if any (libass needs its directory)
+        self.font_dir = os.path.dirname(self.font.path) if getattr(self.font, "path", None) else None
+        self.max_bytes = max_bytes
+        self._glyphs = OrderedDict()  # word -> (rgb, alpha), least recently used first
+        self._glyph_bytes = 0
+        self._scaled = OrderedDict()  # font size -> CaptionRenderer
+        self._lock = threading.Lock()  # renders share one renderer
+
+    def style(self):
+        """Constructor arguments that recreate this renderer (e.g. in a worker process)."""
+        return {
+            "font_path": self.font_file, "font_size": self.font_size, "color": self.color,
+            "stroke_color": self.stroke_color, "stroke_width": self.stroke_width,
+        }
+
+    def scaled(self, factor):
+        """A renderer with the same style at factor x the size (for downscaled renders)."""
+        font_size = max(1, round(self.font_size * factor))
+        if font_size == self.font_size:
+            return self
+        # Kept so repeated renders at the same size reuse the glyph cache
+        with self._lock:
+            renderer = self._scaled.get(font_size)
+            if renderer is None:
+                renderer = self._scaled[font_size] = CaptionRenderer(
+                    self.font_file, font_size=font_size, color=self.color, stroke_color=self.stroke_color,
+                    stroke_width=max(1, round(self.stroke_width * factor)), max_bytes=self.max_bytes,
+                )
+                if len(self._scaled) > MAX_SCALED:
+                    self._scaled.popitem(last=False)
+            self._scaled.move_to_end(font_size)
+        return renderer
+
+    @staticmethod
+    def _load_font(font_path, font_size):
+        """Returns (font file or None, PIL font), falling back to common/bundled fonts."""
+        for candidate in (font_path, "DejaVuSans-Bold.ttf", "Arial Bold.ttf", "Arial.ttf"):
+            if not candidate:
+                continue
+            try:
+                return candidate, ImageFont.truetype(candidate, font_size)
+            except OSError:
+                continue
+        print(f"Warning: font '{font_path}' not found. Using PIL default font.")
+        return None, ImageFont.load_default(size=font_size)
+
+    def glyph(self, word):
+        """Returns the cached (rgb uint8 HxWx3, alpha float32 HxWx1) bitmap for a word."""
+        with self._lock:
+            cached = self._glyphs.get(word)
+            if cached is not None:
+                self._glyphs.move_to_end(word)
+                return cached
+
+        probe = ImageDraw.Draw(Image.new("L", (1, 1)))
+        left, top, right, bottom = probe.textbbox((0, 0), word, font=self.font, stroke_width=self.stroke_width)
+        image = Image.new("RGBA", (max(1, right - left), max(1, bottom - top)), (0, 0, 0, 0))
+        ImageDraw.Draw(image).text(
+            (-left, -top), word, font=self.font, fill=self.color,
+            stroke_width=self.stroke_width, stroke_fill=self.stroke_color,
+        )
+        pixels = np.asarray(image)
+        cached = (np.ascontiguousarray(pixels[:, :, :3]), pixels[:, :, 3:4].astype(np.float32) / 255.0)
+        with self._lock:
+            if word not in self._glyphs:
+                self._glyphs[word] = cached
+                self._glyph_bytes += cached[0].nbytes + cached[1].nbytes
+            while self._glyph_bytes > self.max_bytes and len(self._glyphs) > 1:
+                rgb, alpha = self._glyphs.popitem(last=False)[1]
+                self._glyph_bytes -= rgb.nbytes + alpha.nbytes
+        return cached
+
+    def write_ass(self, words, path, width, height, duration, watermark=None, watermark_opacity=0.6):
+        """
+        Writes the same captions (and optional bottom-right watermark) as an
+        ASS subtitle file for ffmpeg's libass-based `subtitles` filter.
+        """
+        family, style = self.font.getname() if hasattr(self.font, "getname") else ("Sans", "")
+        bold = -1 if style and "bold" in style.lower() else 0
+        watermark_alpha = round(255 * (1 - watermark_opacity))
+        lines = [
+            "[Script Info]",
+            "ScriptType: v4.00+",
+            f"PlayResX: {width}",
+            f"PlayResY: {height}",
+            "WrapStyle: 2",
+            "ScaledBorderAndShadow: yes",
+            "",
+            "[V4+ Styles]",
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+            "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+            "Alignment, MarginL, MarginR, MarginV, Encoding",
+            f"Style: Caption,{family},{self.font_size},{_ass_color(self.color)},&H000000FF,"
+            f"{_ass_color(self.stroke_color)},&H00000000,{bold},0,0,0,100,100,0,0,1,{self.stroke_width},0,5,0,0,0,1",
+            f"Style: Watermark,{family},30,{_ass_color('white', watermark_alpha)},&H000000FF,"
+            f"{_ass_color('black', watermark_alpha)},&H00000000,{bold},0,0,0,100,100,0,0,1,1,0,3,0,0,0,1",
+            "",
+            "[Events]",
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+        ]
+        for w in words:
+            text = w["word"].strip()
+            if text:
+                lines.append(f"Dialogue: 0,{_ass_time(w['start'])},{_ass_time(w['end'])},Caption,,0,0,0,,{_ass_escape(text)}")
+        if watermark:
+            lines.append(f"Dialogue: 1,{_ass_time(0)},{_ass_time(duration)},Watermark,,0,0,0,,{_ass_escape(watermark)}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
+
+
+def _ass_color(color, alpha=0):
+    """PIL color name/hex -> ASS &HAABBGGRR (alpha 0 = opaque)."""
+    r, g, b = ImageColor.getrgb(color)[:3]
+    return f"&H{alpha:02X}{b:02X}{g:02X}{r:02X}"
+
+
+def _ass_time(seconds):
+    centis = max(0, int(round(seconds * 100)))
+    return f"{centis // 360000}:{centis // 6000 % 60:02d}:{centis // 100 % 60:02d}.{centis % 100:02d}"
+
+
+def _ass_escape(text):
+    return text.replace("\\", "\\\\").replace("{", "\\{").replace("}", "\\}").replace("\n", " ")
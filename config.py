@@ -13,11 +13,90 @@ REPLICATE_API_TOKEN = os.getenv("REPLICATE_API_TOKEN")
 VIDEO_MODEL = os.getenv("VIDEO_MODEL", "budget")  # Options: "sora-2", "veo", "budget"
 CONTENT_MODE = os.getenv("CONTENT_MODE", "MEME") # Options: "MEME", "INFORMAL", "EDUCATIONAL", "NEWS"
 
+# Scene Generation Concurrency (max parallel provider calls per tier, shared across requests)
+SCENE_CONCURRENCY = {
+    "budget": int(os.getenv("SCENE_CONCURRENCY_BUDGET", "3")),
+    "veo-2": int(os.getenv("SCENE_CONCURRENCY_VEO", "2")),
+    "sora-2": int(os.getenv("SCENE_CONCURRENCY_SORA", "2")),
+}
+
+# Video Providers (renders are submitted, then polled with exponential backoff)
+PROVIDER_POLL_INITIAL = float(os.getenv("PROVIDER_POLL_INITIAL", "2"))  # seconds before the first poll
+PROVIDER_POLL_MAX = float(os.getenv("PROVIDER_POLL_MAX", "15"))  # cap on the poll interval
+PROVIDER_TIMEOUT = float(os.getenv("PROVIDER_TIMEOUT", "900"))  # renders cancelled after this
+
+# Render Jobs
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "2"))  # renders running at once
+RENDER_QUEUE_LIMIT = int(os.getenv("RENDER_QUEUE_LIMIT", "20"))  # queued renders before rejecting
+JOB_HISTORY_LIMIT = int(os.getenv("JOB_HISTORY_LIMIT", "200"))  # finished jobs kept for polling
+JOB_WORKSPACE_RETENTION = float(os.getenv("JOB_WORKSPACE_RETENTION", "3600"))  # seconds scratch files outlive their job
+
+# Final Assembly
+ASSEMBLY_ENGINE = os.getenv("ASSEMBLY_ENGINE", "moviepy")  # Options: "moviepy", "ffmpeg"
+
+# Voiceover (streamed per sentence; captions are aligned while later sentences synthesize)
+TTS_CONCURRENCY = int(os.getenv("TTS_CONCURRENCY", "3"))  # sentences synthesized at once
+TTS_CHUNK_SIZE = int(os.getenv("TTS_CHUNK_SIZE", str(64 * 1024)))  # bytes per streamed write
+CAPTION_ALIGNER = os.getenv("CAPTION_ALIGNER", "local")  # Options: "local" (offline), "whisper", "linear"
+CAPTION_GLYPH_CACHE_BYTES = int(os.getenv("CAPTION_GLYPH_CACHE_BYTES", str(32 * 1024 ** 2)))  # per caption size
+
+# Scene Normalization (every scene is transcoded once to the canonical 9:16 format, then cached)
+SCENE_WIDTH = int(os.getenv("SCENE_WIDTH", "1080"))
+SCENE_HEIGHT = int(os.getenv("SCENE_HEIGHT", "1920"))
+SCENE_FPS = int(os.getenv("SCENE_FPS", "24"))
+SCENE_FIT = os.getenv("SCENE_FIT", "pad")  # Options: "pad" (letterbox), "crop" (fill)
+SCENE_NORMALIZE_WORKERS = int(os.getenv("SCENE_NORMALIZE_WORKERS", str(os.cpu_count() or 2)))
+
+# Render Farm (MoviePy engine: timeline segments composited in parallel worker processes)
+RENDER_FARM_WORKERS = int(os.getenv("RENDER_FARM_WORKERS", str(os.cpu_count() or 1)))  # 1 disables
+RENDER_FARM_MIN_SEGMENT = float(os.getenv("RENDER_FARM_MIN_SEGMENT", "5"))  # seconds; shorter videos aren't split
+
+# Render Profiles (x264 settings per stage of review; height None keeps the scene resolution)
+ENCODE_THREADS = int(os.getenv("ENCODE_THREADS", str(max(1, (os.cpu_count() or 2) // RENDER_WORKERS))))
+RENDER_PROFILES = {
+    "draft": {"height": 640, "fps": 15, "preset": "ultrafast", "crf": 32, "threads": ENCODE_THREADS},
+    "preview": {"height": 1280, "fps": 24, "preset": "veryfast", "crf": 26, "threads": ENCODE_THREADS},
+    "final": {"height": None, "fps": 24, "preset": "slow", "crf": 18, "threads": ENCODE_THREADS},
+}
+RENDER_PROFILE = os.getenv("RENDER_PROFILE", "final")  # Options: "draft", "preview", "final"
+
+# Previews (poster frame + animated GIF per render, cached next to the video)
+PREVIEW_FRAMES = int(os.getenv("PREVIEW_FRAMES", "12"))  # frames sampled evenly across the video
+PREVIEW_WIDTH = int(os.getenv("PREVIEW_WIDTH", "240"))  # GIF width in pixels
+PREVIEW_FPS = float(os.getenv("PREVIEW_FPS", "4"))  # GIF playback rate
+POSTER_WIDTH = int(os.getenv("POSTER_WIDTH", "540"))  # poster/thumbnail width in pixels
+
+# Media Serving (/output)
+MEDIA_FASTSTART = os.getenv("MEDIA_FASTSTART", "true").lower() == "true"  # moov atom first: playback starts before the download ends
+MEDIA_IMMUTABLE_MAX_AGE = int(os.getenv("MEDIA_IMMUTABLE_MAX_AGE", str(365 * 24 * 3600)))  # seconds, content-hashed files
+
+# Scene Downloads
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(1024 * 1024)))  # bytes per read
+DOWNLOAD_MAX_BYTES = int(os.getenv("DOWNLOAD_MAX_BYTES", str(500 * 1024 * 1024)))  # per file
+DOWNLOAD_TIMEOUT = float(os.getenv("DOWNLOAD_TIMEOUT", "30"))  # connect/read timeout in seconds
+DOWNLOAD_RETRIES = int(os.getenv("DOWNLOAD_RETRIES", "3"))
+DOWNLOAD_POOL_SIZE = int(os.getenv("DOWNLOAD_POOL_SIZE", "10"))  # keep-alive connections per host
+
+# Caches (content-addressed, LRU eviction by size)
+SCENE_CACHE_ENABLED = os.getenv("SCENE_CACHE_ENABLED", "true").lower() == "true"
+SCENE_CACHE_MAX_BYTES = int(os.getenv("SCENE_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+NORMALIZED_CACHE_MAX_BYTES = int(os.getenv("NORMALIZED_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+SPEECH_CACHE_ENABLED = os.getenv("SPEECH_CACHE_ENABLED", "true").lower() == "true"
+SPEECH_CACHE_MAX_BYTES = int(os.getenv("SPEECH_CACHE_MAX_BYTES", str(512 * 1024 ** 2)))
+SCRIPT_CACHE_TTL = float(os.getenv("SCRIPT_CACHE_TTL", "600"))  # seconds; 0 disables
+SCRIPT_CACHE_MAX_ENTRIES = int(os.getenv("SCRIPT_CACHE_MAX_ENTRIES", "256"))
+
+# Trends
+TREND_REFRESH_SECONDS = float(os.getenv("TREND_REFRESH_SECONDS", "900"))  # snapshot goes stale after this
+TREND_RETRY_SECONDS = float(os.getenv("TREND_RETRY_SECONDS", "60"))  # wait after a failed refresh (previous snapshot kept)
+
 # Autonomous Content Generation Settings
 VIDEO_PROMPTS_MIN = int(os.getenv("VIDEO_PROMPTS_MIN", "10"))
 VIDEO_PROMPTS_MAX = int(os.getenv("VIDEO_PROMPTS_MAX", "20"))
 IMAGE_PROMPTS_MIN = int(os.getenv("IMAGE_PROMPTS_MIN", "5"))
 IMAGE_PROMPTS_MAX = int(os.getenv("IMAGE_PROMPTS_MAX", "10"))
+PROMPT_CONCURRENCY = int(os.getenv("PROMPT_CONCURRENCY", "8"))  # parallel OpenAI prompt calls
+PROMPT_BATCH_SIZE = int(os.getenv("PROMPT_BATCH_SIZE", "8"))  # topics per OpenAI request
 
 # Content mix: 70% serious/educational, 30% meme/absurd
 SERIOUS_CONTENT_RATIO = float(os.getenv("SERIOUS_CONTENT_RATIO", "0.70"))
@@ -40,6 +119,9 @@ EMOTIONAL_ANGLES = ["greed", "fear", "hope", "regret", "relief", "surprise"]
 FONTS_DIR = os.path.join(os.path.dirname(__file__), "fonts")
 ASSETS_DIR = os.path.join(os.path.dirname(__file__), "assets")
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "output")
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(os.path.dirname(__file__), "cache"))  # outside OUTPUT_DIR: never served
+JOBS_DIR = os.getenv("JOBS_DIR", os.path.join(OUTPUT_DIR, "jobs"))  # per-job scratch workspaces
+TREND_SNAPSHOT_PATH = os.getenv("TREND_SNAPSHOT_PATH", os.path.join(OUTPUT_DIR, "trends_snapshot.json"))
 
 # Ensure directories exist
 os.makedirs(FONTS_DIR, exist_ok=True)
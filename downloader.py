@@ -0,0 +1,118 @@
+import os
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from cache import file_sha256
+from config import (
+    DOWNLOAD_CHUNK_SIZE, DOWNLOAD_MAX_BYTES, DOWNLOAD_TIMEOUT,
+    DOWNLOAD_RETRIES, DOWNLOAD_POOL_SIZE
+)
+
+
+class DownloadError(Exception):
+    """Raised when a file cannot be downloaded completely and intact."""
+
+
+class SceneDownloader:
+    """
+    Streams remote media to disk in fixed-size chunks.
+
+    - One shared keep-alive session, so repeated downloads from the same CDN reuse connections
+    - Partial data is kept in '<dest>.part' and resumed with an HTTP Range request
+    - Downloads over max_bytes are aborted; the finished file's SHA-256 is returned and
+      checked against expected_sha256 when given
+    """
+
+    def __init__(self, chunk_size=DOWNLOAD_CHUNK_SIZE, max_bytes=DOWNLOAD_MAX_BYTES,
+                 timeout=DOWNLOAD_TIMEOUT, retries=DOWNLOAD_RETRIES, pool_size=DOWNLOAD_POOL_SIZE):
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.retries = retries
+
+        self.session = requests.Session()
+        # Only 502/503/504 responses are retried here; failed connections and interrupted
+        # bodies are retried (and resumed) by download(), so nothing is retried twice
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=retries, connect=0, read=0, other=0, status=retries, backoff_factor=0.5,
+                              status_forcelist=(502, 503, 504), allowed_methods=("GET",), raise_on_status=False),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def download(self, url, dest_path, expected_sha256=None):
+        """
+        Downloads url to dest_path.
+        Returns {"path", "bytes", "sha256", "resumed"}; raises DownloadError on failure.
+        """
+        part_path = dest_path + ".part"
+        last_error = None
+
+        for attempt in range(self.retries + 1):
+            try:
+                resumed = self._stream_to_part(url, part_path)
+                break
+            except DownloadError:
+                self._discard(part_path)
+                raise
+            except requests.RequestException as e:
+                # Keep the partial file; the next attempt resumes from its size
+                last_error = e
+                print(f"Download interrupted ({attempt + 1}/{self.retries + 1}) for {url}: {e}")
+                if attempt < self.retries:
+                    time.sleep(0.5 * 2 ** attempt)
+        else:
+            raise DownloadError(f"Failed to download {url}: {last_error}")
+
+        digest, size = file_sha256(part_path, self.chunk_size), os.path.getsize(part_path)
+        if expected_sha256 and digest != expected_sha256.lower():
+            self._discard(part_path)
+            raise DownloadError(f"Checksum mismatch for {url}: expected {expected_sha256}, got {digest}")
+
+        os.replace(part_path, dest_path)
+        return {"path": dest_path, "bytes": size, "sha256": digest, "resumed": resumed}
+
+    def _stream_to_part(self, url, part_path):
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 416 and offset:
+                # Requested range starts at the end: the part file is already complete
+                return True
+            if response.status_code not in (200, 206):
+                raise DownloadError(f"Unexpected HTTP {response.status_code} for {url}")
+
+            resumed = response.status_code == 206
+            if not resumed:
+                # Server ignored the Range header; start over
+                offset = 0
+
+            length = response.headers.get("Content-Length")
+            if length and offset + int(length) > self.max_bytes:
+                raise DownloadError(f"{url} is {offset + int(length)} bytes, limit is {self.max_bytes}")
+
+            written = offset
+            with open(part_path, "ab" if resumed else "wb") as f:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    written += len(chunk)
+                    if written > self.max_bytes:
+                        raise DownloadError(f"{url} exceeded the {self.max_bytes} byte limit")
+                    f.write(chunk)
+            return resumed
+
+    @staticmethod
+    def _discard(path):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    downloader = SceneDownloader()
+    print(downloader.download(
+        "https://storage.googleapis.com/gtv-videos-bucket/sample/ForBiggerBlazes.mp4",
+        os.path.join("output", "download_test.mp4"),
+    ))
@@ -1,17 +1,81 @@
+import io
+import json
 import os
-from moviepy import VideoFileClip, TextClip, CompositeVideoClip, AudioFileClip, concatenate_videoclips
-from config import FONTS_DIR, OUTPUT_DIR, ELEVENLABS_KEY, OPENAI_API_KEY
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import ExitStack
+from moviepy import AudioFileClip
+from PIL import Image
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+import media
+from cache import DiskCache, file_sha256
+from captions import CaptionRenderer
+from speech import SpeechSynthesizer, linear_timings
+from aligner import EnergyAligner
+from ffmpeg_engine import FFmpegAssembler
+from render_farm import RenderFarm, compose_timeline
+from memory import PeakRSS
+from config import (
+    FONTS_DIR, OUTPUT_DIR, ELEVENLABS_KEY, OPENAI_API_KEY, ASSEMBLY_ENGINE,
+    NORMALIZED_CACHE_MAX_BYTES, RENDER_PROFILES, RENDER_PROFILE, CAPTION_ALIGNER,
+    SPEECH_CACHE_ENABLED, SPEECH_CACHE_MAX_BYTES,
+    SCENE_WIDTH, SCENE_HEIGHT, SCENE_FPS, SCENE_FIT, SCENE_NORMALIZE_WORKERS,
+    PREVIEW_FRAMES, PREVIEW_WIDTH, PREVIEW_FPS, POSTER_WIDTH, MEDIA_FASTSTART
+)
 from openai import OpenAI
+from proglog import ProgressBarLogger
 import requests
 
 
+class EncodeProgressLogger(ProgressBarLogger):
+    """Forwards MoviePy's frame progress as whole-percent 'encode_progress' events."""
+
+    def __init__(self, progress):
+        super().__init__()
+        self.progress = progress
+        self.last_percent = -1
+
+    def bars_callback(self, bar, attr, value, old_value=None):
+        if bar != "frame_index" or attr != "index":
+            return
+        total = self.bars[bar].get("total")
+        if not total:
+            return
+        percent = min(100, int(100 * (value + 1) / total))
+        if percent != self.last_percent:
+            self.last_percent = percent
+            self.progress("encode_progress", percent=percent)
+
+
+def _field(item, name):
+    # Whisper words arrive as SDK objects; cached/serialized ones as dicts
+    return item[name] if isinstance(item, dict) else getattr(item, name)
+
+
 class VideoEditor:
     def __init__(self):
         self.font_path = self._get_font_path()
+        self.captions = CaptionRenderer(self.font_path)
+        self.ffmpeg = FFmpegAssembler(self.captions)
+        self.farm = RenderFarm()
+        # Scenes re-encoded to a common format, keyed by content + target format
+        self.normalized_cache = DiskCache("normalized", NORMALIZED_CACHE_MAX_BYTES)
+        self.aligner = EnergyAligner()
+        # Voiceovers and their caption timings, keyed by (model, voice, speed, text)
+        self.speech_cache = DiskCache("speech", SPEECH_CACHE_MAX_BYTES)
         if OPENAI_API_KEY:
             self.client = OpenAI(api_key=OPENAI_API_KEY)
         else:
             self.client = None
+        # Voice 'onyx' is deep and assertive, close to the description; slightly accelerated
+        self.speech = SpeechSynthesizer(self.client, model="tts-1", voice="onyx", speed=1.1) if self.client else None
+        # Previews missing from the renders listing are built here, one video at a time
+        self._preview_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="previews")
+        self._previews_pending = set()
+        self._previews_lock = threading.Lock()
 
     def _get_font_path(self):
         # Check for preferred fonts in FONTS_DIR
@@ -23,11 +87,21 @@ class VideoEditor:
         # Fallback to a system font or default
         return "Arial-Bold"
 
-    def generate_audio(self, text, voice="kai"):
+    def generate_audio(self, text, voice="kai", output_path=None):
         """
         Generates audio from text using OpenAI TTS (or ElevenLabs).
+        output_path: where to write the MP3 (defaults to a new uniquely named file in OUTPUT_DIR).
         Returns path to audio file.
         """
+        return self.generate_speech(text, voice, output_path, aligner=None)["audio_path"]
+
+    def generate_speech(self, text, voice="kai", output_path=None, aligner=CAPTION_ALIGNER):
+        """
+        Generates the voiceover and, unless aligner is None, its word timings in the same pass.
+        aligner: "local", "whisper" or "linear" (see SpeechSynthesizer).
+        Returns {"audio_path", "words", "source", "cached"}; words is None if no timings were produced.
+        An unchanged script reuses the cached voiceover and timings, skipping TTS and alignment.
+        """
         print(f"Generating audio for: {text[:20]}...")
         
         if not self.client:
@@ -37,20 +111,45 @@ class VideoEditor:
             # We need a valid audio file for MoviePy. 
             # Since we can't easily generate one without a library, we might fail here if we don't have one.
             # But for now let's return the path and hope the user provides the key or we use a pre-existing file.
-            return mock_audio_path
-
-        # Using OpenAI TTS for simplicity and speed in this demo
-        # Voice 'onyx' is deep and assertive, close to the description
-        response = self.client.audio.speech.create(
-            model="tts-1",
-            voice="onyx",
-            input=text,
-            speed=1.1 # Slightly accelerated
-        )
-        
-        audio_path = os.path.join(OUTPUT_DIR, "temp_audio.mp3")
-        response.stream_to_file(audio_path)
-        return audio_path
+            return {"audio_path": mock_audio_path, "words": None, "source": None, "cached": False}
+
+        # Never a shared default name: concurrent or later calls would overwrite it
+        audio_path = output_path or os.path.join(OUTPUT_DIR, f"voiceover_{uuid.uuid4().hex[:12]}.mp3")
+        key = self.speech_cache.make_key("speech", self.speech.model, self.speech.voice, self.speech.speed, text.strip())
+        timings_key = self.speech_cache.make_key(key, aligner)
+
+        if SPEECH_CACHE_ENABLED and self.speech_cache.fetch(key, audio_path, suffix=".mp3"):
+            print("Voiceover served from cache.")
+            if not aligner:
+                return {"audio_path": audio_path, "words": None, "source": None, "cached": True}
+            timings = self._cached_timings(timings_key)
+            if timings is None:
+                # Same voiceover, not yet aligned this way
+                duration = ffmpeg_parse_infos(audio_path)["duration"]
+                words, source = self.caption_timings(audio_path, text, duration, aligner)
+                timings = {"words": words, "source": source}
+                self.speech_cache.put_bytes(timings_key, json.dumps(timings).encode("utf-8"), ".json")
+            return {"audio_path": audio_path, **timings, "cached": True}
+
+        # OpenAI TTS, streamed sentence by sentence with alignment overlapped
+        result = self.speech.synthesize(text, audio_path, aligner=aligner)
+        if SPEECH_CACHE_ENABLED:
+            self.speech_cache.put(key, audio_path, suffix=".mp3")
+            if result["words"] is not None:
+                timings = {"words": result["words"], "source": result["source"]}
+                self.speech_cache.put_bytes(timings_key, json.dumps(timings).encode("utf-8"), ".json")
+        return {**result, "cached": False}
+
+    def _cached_timings(self, key):
+        path = self.speech_cache.get(key, suffix=".json")
+        if not path:
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # Evicted or half-written; realign
+            return None
 
     def generate_captions(self, audio_path):
         """
@@ -74,99 +173,298 @@ class VideoEditor:
             print(f"Error generating captions: {e}")
             return []
 
-    def assemble_video(self, video_paths, audio_path, script_text, output_filename="final_video.mp4"):
+    def caption_timings(self, audio_path, script_text, duration, aligner=CAPTION_ALIGNER):
+        """
+        Word timings for captions as ([{"word", "start", "end"}, ...], source).
+        Uses Whisper only when aligner is "whisper"; otherwise (or if Whisper fails) aligns
+        the script to the audio offline, and as a last resort spreads it evenly.
+        """
+        if aligner == "whisper":
+            captions = self.generate_captions(audio_path)
+            if captions:
+                return [
+                    {"word": _field(item, "word"), "start": _field(item, "start"), "end": _field(item, "end")}
+                    for item in captions
+                ], "whisper"
+
+        if aligner != "linear":
+            try:
+                words = self.aligner.align(audio_path, script_text)
+                if words:
+                    return words, "local"
+            except Exception as e:
+                print(f"Error aligning captions locally: {e}")
+
+        # Fallback to linear timing
+        print("Using fallback linear timing for captions.")
+        return linear_timings(script_text, duration), "linear"
+
+    def assemble_video(self, video_paths, audio_path, script_text, output_filename="final_video.mp4",
+                       progress=None, engine=ASSEMBLY_ENGINE, profile=RENDER_PROFILE, timings=None):
         """
         Stitches video(s), audio, and subtitles.
         video_paths: List of video file paths or single path string.
+        progress: Optional callable(event, **data) for captions/encode progress events.
+        engine: "moviepy" (frame-by-frame compositing) or "ffmpeg" (single native filtergraph).
+        profile: RENDER_PROFILES name ("draft", "preview", "final") for resolution, fps and x264 settings.
+        timings: (words, source) from generate_speech; computed here (Whisper/linear) when omitted.
         """
-        print("Assembling video...")
+        print(f"Assembling video ({engine}, {profile} profile)...")
         
+        # Handle single path or list
+        if isinstance(video_paths, str):
+            video_paths = [video_paths]
+
         try:
-            # Handle single path or list
-            if isinstance(video_paths, str):
-                video_paths = [video_paths]
-
-            # Load Audio
-            audio_clip = AudioFileClip(audio_path)
-            
-            # Load and Stitch Videos
-            clips = []
-            current_duration = 0
-            target_duration = audio_clip.duration
-            
-            # Simple logic: Loop through provided videos until we fill the audio duration
-            while current_duration < target_duration:
-                for path in video_paths:
-                    if not os.path.exists(path):
-                        print(f"Warning: Video path not found: {path}")
-                        continue
-                    clip = VideoFileClip(path)
-                    # Resize if needed (optional, assuming all are same aspect ratio)
-                    clips.append(clip)
-                    current_duration += clip.duration
-                    if current_duration >= target_duration:
-                        break
-            
-            if not clips:
+            existing = [p for p in video_paths if os.path.exists(p)]
+            for path in set(video_paths) - set(existing):
+                print(f"Warning: Video path not found: {path}")
+            if not existing:
                 print("No valid video clips found.")
                 return None
 
-            stitched_video = concatenate_videoclips(clips, method="compose")
-            
-            # Loop or cut to match audio
-            if stitched_video.duration < target_duration:
-                final_video = stitched_video.loop(duration=target_duration)
-            else:
-                final_video = stitched_video.subclip(0, target_duration)
-                
-            final_video = final_video.set_audio(audio_clip)
-            
-            # Generate Subtitles (Whisper or Fallback)
-            captions = self.generate_captions(audio_path)
-            txt_clips = []
-            
-            if captions:
-                for item in captions:
-                    word = item['word']
-                    start = item['start']
-                    end = item['end']
-                    duration = end - start
-                    
-                    txt_clip = (TextClip(word.strip(), fontsize=70, color='yellow', font=self.font_path, stroke_color='black', stroke_width=2)
-                                .set_position('center')
-                                .set_start(start)
-                                .set_duration(duration))
-                    txt_clips.append(txt_clip)
-            else:
-                # Fallback to linear timing
-                print("Using fallback linear timing for captions.")
-                words = script_text.split()
-                duration_per_word = audio_clip.duration / len(words)
-                for i, word in enumerate(words):
-                    txt_clip = (TextClip(word, fontsize=70, color='yellow', font=self.font_path, stroke_color='black', stroke_width=2)
-                                .set_position('center')
-                                .set_duration(duration_per_word)
-                                .set_start(i * duration_per_word))
-                    txt_clips.append(txt_clip)
-                
-            # Watermark
-            watermark = (TextClip("TradingWizard AI", fontsize=30, color='white', font=self.font_path, stroke_color='black', stroke_width=1)
-                         .set_position(('right', 'bottom'))
-                         .set_duration(audio_clip.duration)
-                         .set_opacity(0.6))
-            
-            # Composite
-            final = CompositeVideoClip([final_video] + txt_clips + [watermark])
-            
+            settings = RENDER_PROFILES[profile]
+            target_duration = ffmpeg_parse_infos(audio_path)["duration"]
             output_path = os.path.join(OUTPUT_DIR, output_filename)
-            final.write_videofile(output_path, codec='libx264', audio_codec='aac', fps=24)
-            
-            return output_path
-            
+            # Encoded under a temporary name and renamed once complete
+            partial_path = os.path.splitext(output_path)[0] + ".partial.mp4"
+
+            # Subtitles (Whisper or Fallback) unless aligned during synthesis
+            words, source = timings or self.caption_timings(audio_path, script_text, target_duration)
+            if progress:
+                progress("captions_done", words=len(words), source=source)
+
+            try:
+                with tempfile.TemporaryDirectory(prefix="stitch_") as tmp_dir, PeakRSS() as rss:
+                    stitched_path = self.stitch_scenes(existing, target_duration, tmp_dir)
+                    if engine == "ffmpeg":
+                        self.ffmpeg.assemble([stitched_path], audio_path, words, partial_path, target_duration,
+                                             profile=settings, progress=progress)
+                    else:
+                        self._assemble_moviepy(stitched_path, audio_path, words, partial_path,
+                                               target_duration, settings, progress)
+                os.replace(partial_path, output_path)
+                result = output_path
+            finally:
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
+
+            stats = rss.report()
+            print(f"Assembly memory: {stats}")
+            if progress:
+                progress("assembly_stats", **stats)
+            return result
+
         except Exception as e:
             print(f"Error assembling video: {e}")
             return None
 
+    def normalize_scenes(self, video_paths, work_dir):
+        """
+        Transcodes scenes to the canonical SCENE_WIDTH x SCENE_HEIGHT @ SCENE_FPS format,
+        several at once (x264 threads split between them). Results are cached by content,
+        so each distinct scene is only ever transcoded once. Returns the new paths in order;
+        scenes that fail to normalize are passed through unchanged.
+        """
+        existing = [path for path in video_paths if os.path.exists(path)]
+        if not existing:
+            return list(video_paths)
+        workers = max(1, min(SCENE_NORMALIZE_WORKERS, len(existing)))
+        threads = max(1, (os.cpu_count() or 1) // workers)
+
+        def normalize(item):
+            i, path = item
+            dest_path = os.path.join(work_dir, f"normalized_{i}.mp4")
+            try:
+                return self.normalize_scene(path, dest_path, threads=threads)
+            except Exception as e:
+                print(f"Error normalizing {path}: {e}")
+                return path
+
+        # The render's memory meter counts these threads' ffmpeg processes too
+        meter = PeakRSS.current()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="normalize",
+                                initializer=meter.attach if meter else None) as pool:
+            return list(pool.map(normalize, enumerate(existing)))
+
+    def normalize_scene(self, path, dest_path, threads=0):
+        """Places the canonical version of a scene at dest_path (from cache when possible)."""
+        key = self.normalized_cache.make_key(file_sha256(path), SCENE_WIDTH, SCENE_HEIGHT, SCENE_FPS, SCENE_FIT)
+        if self.normalized_cache.fetch(key, dest_path):
+            return dest_path
+        media.normalize(path, dest_path, SCENE_WIDTH, SCENE_HEIGHT, SCENE_FPS, fit=SCENE_FIT, threads=threads)
+        self.normalized_cache.put(key, dest_path)
+        return dest_path
+
+    def stitch_scenes(self, video_paths, target_duration, work_dir):
+        """
+        Joins scenes (cycled in order) into one clip covering target_duration
+        without decoding them. Clips that already share codec, profile, size and
+        fps (e.g. from normalize_scenes) are stream-copied as-is; otherwise they
+        are normalized first.
+        """
+        probes = [media.probe(path) for path in video_paths]
+        if not media.compatible(probes):
+            print(f"Scenes differ in format; normalizing to {SCENE_WIDTH}x{SCENE_HEIGHT}@{SCENE_FPS}fps")
+            video_paths = self.normalize_scenes(video_paths, work_dir)
+            probes = [media.probe(path) for path in video_paths]
+
+        sequence = media.scene_sequence([p["duration"] for p in probes], target_duration)
+        if sequence == [0]:
+            # A single scene long enough on its own: nothing to join
+            return video_paths[0]
+        stitched_path = os.path.join(work_dir, "stitched.mp4")
+        return media.concat_copy([video_paths[i] for i in sequence], stitched_path, duration=target_duration)
+
+    def publish(self, video_path):
+        """
+        Readies a finished render for serving: moves the moov atom to the front
+        (MEDIA_FASTSTART) so playback starts while it downloads, then renames
+        it to <name>.<sha256[:12]>.mp4. A hashed name never changes content,
+        so /output serves it as immutable. Returns the new path (the old one
+        if anything fails).
+        """
+        try:
+            if MEDIA_FASTSTART:
+                media.faststart(video_path)
+            stem, ext = os.path.splitext(video_path)
+            published_path = f"{stem}.{file_sha256(video_path)[:12]}{ext}"
+            os.replace(video_path, published_path)
+            return published_path
+        except Exception as e:
+            print(f"Error publishing {video_path}: {e}")
+            return video_path
+
+    def generate_previews(self, video_path):
+        """
+        Poster frame (JPEG, also used as the post thumbnail) and a low-res
+        animated preview (GIF) for a render, cached next to it as
+        <name>.poster.jpg and <name>.preview.gif and reused while newer than
+        the video. Frames are keyframes pulled by seeking, one decoded frame
+        each, never a full decode. Returns {"poster", "preview"} paths, or None on failure.
+        """
+        stem = os.path.splitext(video_path)[0]
+        paths = {"poster": stem + ".poster.jpg", "preview": stem + ".preview.gif"}
+        try:
+            if self.cached_previews(video_path):
+                return paths
+
+            duration = media.probe(video_path)["duration"]
+            # Sample the middle of each slice, so no frame sits on the very first/last frame
+            times = [duration * (i + 0.5) / PREVIEW_FRAMES for i in range(PREVIEW_FRAMES)]
+            with ThreadPoolExecutor(max_workers=min(4, PREVIEW_FRAMES), thread_name_prefix="preview") as pool:
+                grabs = list(pool.map(lambda t: media.grab_frame(video_path, t, PREVIEW_WIDTH), times))
+                # A quarter in: past the hook's first words and any fade-in
+                poster = _image(media.grab_frame(video_path, duration * 0.25, POSTER_WIDTH))
+
+            # Samples that snapped to the same keyframe become one longer-held frame
+            frames, delays = [], []
+            for i, grab in enumerate(grabs):
+                if i and grab == grabs[i - 1]:
+                    delays[-1] += round(1000 / PREVIEW_FPS)
+                else:
+                    frames.append(_image(grab))
+                    delays.append(round(1000 / PREVIEW_FPS))
+
+            _save_atomic(paths["poster"], lambda f: poster.save(f, format="JPEG", quality=85))
+            _save_atomic(paths["preview"], lambda f: frames[0].save(
+                f, format="GIF", save_all=True, append_images=frames[1:],
+                duration=delays, loop=0, optimize=True,
+            ))
+            return paths
+        except Exception as e:
+            print(f"Error generating previews for {video_path}: {e}")
+            return None
+
+    def cached_previews(self, video_path):
+        """generate_previews' paths if both exist and are newer than the video, else None."""
+        stem = os.path.splitext(video_path)[0]
+        paths = {"poster": stem + ".poster.jpg", "preview": stem + ".preview.gif"}
+        try:
+            video_mtime = os.path.getmtime(video_path)
+            if all(os.path.getmtime(p) >= video_mtime for p in paths.values()):
+                return paths
+        except OSError:
+            pass
+        return None
+
+    def recent_renders(self, limit=50):
+        """
+        Published renders in OUTPUT_DIR (content-hashed names only, so nothing
+        still encoding), newest first. Previews come from the cache; missing
+        ones are queued for the background and are None until they exist.
+        """
+        renders = []
+        for entry in os.scandir(OUTPUT_DIR):
+            name = entry.name
+            published = name.startswith("viral_") and name.endswith(".mp4") and media.CONTENT_HASHED.search(name)
+            if published and entry.is_file():
+                stat = entry.stat()
+                renders.append({"path": entry.path, "size_bytes": stat.st_size, "modified": stat.st_mtime})
+        renders.sort(key=lambda render: render["modified"], reverse=True)
+        renders = renders[:limit]
+        for render in renders:
+            previews = self.cached_previews(render["path"]) or {}
+            if not previews:
+                self._queue_previews(render["path"])
+            render["poster"], render["preview"] = previews.get("poster"), previews.get("preview")
+        return renders
+
+    def _queue_previews(self, video_path):
+        with self._previews_lock:
+            if video_path in self._previews_pending:
+                return
+            self._previews_pending.add(video_path)
+        self._preview_pool.submit(self._build_previews, video_path)
+
+    def _build_previews(self, video_path):
+        try:
+            self.generate_previews(video_path)
+        finally:
+            with self._previews_lock:
+                self._previews_pending.discard(video_path)
+
+    def _assemble_moviepy(self, stitched_path, audio_path, words, output_path, target_duration, settings, progress):
+        if len(self.farm.segments_for(target_duration, settings["fps"])) > 1:
+            try:
+                return self.farm.render(stitched_path, audio_path, words, output_path, target_duration, settings,
+                                        self.captions, progress=progress)
+            except BrokenProcessPool:
+                print("A render farm worker died; encoding this render in a single process instead")
+
+        # Every clip that owns an ffmpeg reader (subprocess + frame buffer) is closed on exit,
+        # including on errors, instead of lingering until garbage collection
+        with ExitStack() as clips:
+            audio_clip = clips.enter_context(AudioFileClip(audio_path))
+            final = compose_timeline(clips, stitched_path, words, target_duration, settings, self.captions)
+            final = final.with_audio(audio_clip)
+
+            logger = EncodeProgressLogger(progress) if progress else "bar"
+            final.write_videofile(
+                output_path, codec='libx264', audio_codec='aac', fps=settings["fps"],
+                preset=settings["preset"], threads=settings["threads"],
+                ffmpeg_params=["-crf", str(settings["crf"]), *media.keyframe_params(settings["fps"])], logger=logger,
+            )
+        
+        return output_path
+
+def _image(png_bytes):
+    return Image.open(io.BytesIO(png_bytes)).convert("RGB")
+
+
+def _save_atomic(path, write):
+    # Concurrent listings may render the same preview; readers never see a partial file
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path) or ".", suffix=".part", delete=False) as f:
+        try:
+            write(f)
+        except BaseException:
+            f.close()
+            os.remove(f.name)
+            raise
+    os.chmod(f.name, 0o644)  # temp files are created private; previews are served like the video
+    os.replace(f.name, path)
+
+
 if __name__ == "__main__":
     # Mock test
     editor = VideoEditor()
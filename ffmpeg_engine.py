@@ -0,0 +1,98 @@
+import os
+import subprocess
+import tempfile
+from moviepy.config import FFMPEG_BINARY
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+from media import keyframe_params, scene_sequence
+from config import RENDER_PROFILES
+
+
+class FFmpegAssembler:
+    """
+    Final assembly as a single ffmpeg filtergraph, without decoding frames in Python.
+
+    Scenes are padded onto a common canvas (like MoviePy's method="compose"),
+    concatenated and looped/trimmed to the voiceover, captions and watermark
+    are burned in from an ASS file via libass, and the audio is muxed in.
+    """
+
+    def __init__(self, captions, ffmpeg_binary=FFMPEG_BINARY):
+        self.captions = captions  # CaptionRenderer: shared style for the ASS output
+        self.ffmpeg_binary = ffmpeg_binary
+
+    def assemble(self, video_paths, audio_path, words, output_path, duration,
+                 watermark="TradingWizard AI", profile=RENDER_PROFILES["final"], progress=None):
+        """profile: a RENDER_PROFILES entry (height, fps, preset, crf, threads)."""
+        fps = profile["fps"]
+        infos = [ffmpeg_parse_infos(path) for path in video_paths]
+        width = max(info["video_size"][0] for info in infos)
+        height = max(info["video_size"][1] for info in infos)
+        # Even dimensions for yuv420p
+        width, height = width + width % 2, height + height % 2
+
+        sequence = scene_sequence([info["duration"] for info in infos], duration)
+
+        with tempfile.TemporaryDirectory(prefix="assemble_") as tmp_dir:
+            ass_path = self.captions.write_ass(
+                words, os.path.join(tmp_dir, "captions.ass"), width, height, duration, watermark=watermark
+            )
+
+            cmd = [self.ffmpeg_binary, "-y", "-hide_banner", "-loglevel", "error", "-nostats", "-progress", "pipe:1"]
+            for index in sequence:
+                cmd += ["-i", video_paths[index]]
+            cmd += ["-i", audio_path]
+
+            # Normalize every input, concat, trim to the voiceover, burn subtitles
+            chains = [
+                f"[{i}:v]fps={fps},pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:black,"
+                f"setsar=1,format=yuv420p[v{i}]"
+                for i in range(len(sequence))
+            ]
+            concat_inputs = "".join(f"[v{i}]" for i in range(len(sequence)))
+            subtitles = f"subtitles=filename={_filter_escape(ass_path)}"
+            if self.captions.font_dir:
+                subtitles += f":fontsdir={_filter_escape(self.captions.font_dir)}"
+            # Downscale before burning in: libass scales the ASS (laid out at canvas size) to the frame
+            scale = f"scale=-2:{profile['height']}," if profile["height"] and profile["height"] < height else ""
+            chains.append(
+                f"{concat_inputs}concat=n={len(sequence)}:v=1:a=0,"
+                f"trim=duration={duration:.3f},setpts=PTS-STARTPTS,{scale}{subtitles}[vout]"
+            )
+
+            cmd += [
+                "-filter_complex", ";".join(chains),
+                "-map", "[vout]", "-map", f"{len(sequence)}:a:0",
+                "-t", f"{duration:.3f}",
+                "-c:v", "libx264", "-preset", profile["preset"], "-crf", str(profile["crf"]),
+                "-threads", str(profile["threads"]), "-pix_fmt", "yuv420p", "-r", str(fps),
+                *keyframe_params(fps),
+                "-c:a", "aac",
+                output_path,
+            ]
+            self._run(cmd, duration, progress)
+        return output_path
+
+    def _run(self, cmd, duration, progress):
+        # stderr goes to a file: an unread pipe fills up (e.g. per-frame decode errors) and stalls ffmpeg
+        with tempfile.TemporaryFile() as stderr:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr, text=True)
+            last_percent = -1
+            for line in proc.stdout:
+                # -progress emits key=value lines; out_time_us is the encoded position
+                key, _, value = line.strip().partition("=")
+                if progress and key == "out_time_us" and value.isdigit() and duration > 0:
+                    percent = min(100, int(int(value) / 1e6 / duration * 100))
+                    if percent != last_percent:
+                        last_percent = percent
+                        progress("encode_progress", percent=percent)
+            if proc.wait() != 0:
+                stderr.seek(0)
+                raise RuntimeError(f"ffmpeg failed ({proc.returncode}): "
+                                   f"{stderr.read().decode(errors='replace').strip()[-2000:]}")
+
+
+def _filter_escape(path):
+    # Escape for a filtergraph option value: backslash, quote, colon, comma, brackets
+    for char in ("\\", "'", ":", ",", "[", "]", ";"):
+        path = path.replace(char, "\\" + char)
+    return path
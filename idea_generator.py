@@ -1,11 +1,13 @@
 import random
+from concurrent.futures import ThreadPoolExecutor
 from trends import TrendSpotter
 from prompt_factory import PromptFactory
 from schemas import VideoPrompt, ImagePrompt
 from config import (
     VIDEO_PROMPTS_MIN, VIDEO_PROMPTS_MAX,
     IMAGE_PROMPTS_MIN, IMAGE_PROMPTS_MAX,
-    SERIOUS_CONTENT_RATIO, MEME_CONTENT_RATIO
+    SERIOUS_CONTENT_RATIO, MEME_CONTENT_RATIO,
+    PROMPT_CONCURRENCY, PROMPT_BATCH_SIZE
 )
 
 
@@ -20,8 +22,9 @@ class FinanceIdeaGenerator:
     4. Returns pure JSON array
     """
     
-    def __init__(self):
+    def __init__(self, trend_snapshot=None):
         self.trend_spotter = TrendSpotter()
+        self.trend_snapshot = trend_snapshot  # Optional TrendSnapshot shared with the API server
         self.prompt_factory = PromptFactory()
         
     def generate_ideas(self) -> list[dict]:
@@ -33,7 +36,8 @@ class FinanceIdeaGenerator:
         
         # Step 1: Get trending topics (5-15 topics)
         print("📊 Fetching trending finance topics...")
-        topics = self.trend_spotter.get_high_potential_topics(count_range=(5, 15))
+        trends = self.trend_snapshot.topics() if self.trend_snapshot else None
+        topics = self.trend_spotter.get_high_potential_topics(count_range=(5, 15), trends=trends)
         print(f"✓ Found {len(topics)} high-potential topics")
         
         # Step 2: Determine video and image counts
@@ -41,43 +45,44 @@ class FinanceIdeaGenerator:
         image_count = random.randint(IMAGE_PROMPTS_MIN, IMAGE_PROMPTS_MAX)
         print(f"🎥 Generating {video_count} video prompts and {image_count} image prompts...")
         
-        all_prompts = []
-        
-        # Step 3: Generate video prompts
-        print("\n🎬 Creating video prompts...")
+        # Step 3: Plan video prompts
+        print("\n🎬 Planning video prompts...")
         video_topics = self._select_topics_for_videos(topics, video_count)
         
         # Reserve some slots for Kai Zen prompts (approx 20%)
         kai_count = max(1, int(video_count * 0.2))
         standard_count = video_count - kai_count
         
-        # Generate Standard Video Prompts
-        for i, topic_data in enumerate(video_topics[:standard_count], 1):
-            topic = topic_data['topic']
-            is_meme = topic_data['category'] in ['meme', 'story']
-            
+        standard_items = [
+            (t['topic'], t['category'] in ['meme', 'story']) for t in video_topics[:standard_count]
+        ]
+        kai_topics = [t['topic'] for t in video_topics[standard_count:]]
+        for i, (topic, is_meme) in enumerate(standard_items, 1):
             print(f"  [{i}/{video_count}] {topic} {'(MEME)' if is_meme else '(SERIOUS)'}")
-            video_prompt = self.prompt_factory.create_video_prompt(topic, is_meme=is_meme)
-            all_prompts.append(video_prompt.model_dump())
-            
-        # Generate Kai Zen Prompts
-        for i, topic_data in enumerate(video_topics[standard_count:], 1):
-            topic = topic_data['topic']
-            print(f"  [{standard_count + i}/{video_count}] {topic} (KAI ZEN 🧙‍♂️)")
-            kai_prompt = self.prompt_factory.create_kai_prompt(topic)
-            all_prompts.append(kai_prompt.model_dump())
-        
-        # Step 4: Generate image prompts (typically more meme-focused)
-        print("\n🖼️  Creating image prompts...")
+        for i, topic in enumerate(kai_topics, len(standard_items) + 1):
+            print(f"  [{i}/{video_count}] {topic} (KAI ZEN 🧙‍♂️)")
+        
+        # Step 4: Plan image prompts (typically more meme-focused)
+        print("\n🖼️  Planning image prompts...")
         image_topics = self._select_topics_for_images(topics, image_count)
         
-        for i, topic_data in enumerate(image_topics, 1):
-            topic = topic_data['topic']
-            is_meme = True  # Images are typically meme-friendly
-            
+        # Images are typically meme-friendly
+        image_items = [(t['topic'], True) for t in image_topics]
+        for i, (topic, _) in enumerate(image_items, 1):
             print(f"  [{i}/{image_count}] {topic}")
-            image_prompt = self.prompt_factory.create_image_prompt(topic, is_meme=is_meme)
-            all_prompts.append(image_prompt.model_dump())
+        
+        # Each task is one batched OpenAI request; task order is output order
+        tasks = (
+            [(self.prompt_factory.create_video_prompts, chunk) for chunk in self._chunk(standard_items)]
+            + [(self.prompt_factory.create_kai_prompts, chunk) for chunk in self._chunk(kai_topics)]
+            + [(self.prompt_factory.create_image_prompts, chunk) for chunk in self._chunk(image_items)]
+        )
+        
+        # Run the batches concurrently; map() keeps the planned order
+        print(f"\n⚡ Generating prompts in {len(tasks)} batches ({PROMPT_CONCURRENCY} at a time)...")
+        with ThreadPoolExecutor(max_workers=PROMPT_CONCURRENCY) as pool:
+            batches = list(pool.map(lambda task: task[0](task[1]), tasks))
+        all_prompts = [prompt.model_dump() for batch in batches for prompt in batch]
         
         # Step 5: Shuffle for variety
         random.shuffle(all_prompts)
@@ -88,6 +93,11 @@ class FinanceIdeaGenerator:
         
         return all_prompts
     
+    @staticmethod
+    def _chunk(items: list, size: int = PROMPT_BATCH_SIZE) -> list[list]:
+        """Split items into consecutive batches of at most `size`."""
+        return [items[i:i + size] for i in range(0, len(items), max(1, size))]
+    
     def _select_topics_for_videos(self, topics: list[dict], count: int) -> list[dict]:
         """
         Select topics for video generation ensuring proper serious/meme ratio.
@@ -0,0 +1,234 @@
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from config import RENDER_WORKERS, RENDER_QUEUE_LIMIT, JOB_HISTORY_LIMIT, JOB_WORKSPACE_RETENTION, JOBS_DIR
+
+
+class JobQueueFull(Exception):
+    """Raised when the render queue already holds RENDER_QUEUE_LIMIT pending jobs."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's work function once the job has been cancelled."""
+
+
+class Job:
+    """A single background render with per-stage status and timing."""
+
+    def __init__(self, kind="render"):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        # Private scratch directory (scenes, voiceover, intermediates), created when the job starts
+        self.workspace = os.path.join(JOBS_DIR, self.id)
+        self.status = "queued"  # queued -> running -> succeeded | failed | cancelled
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.stages = OrderedDict()
+        self.result = None
+        self.error = None
+        self.future = None
+        self.events = []
+        self._lock = threading.Lock()
+        self._cancel_event = threading.Event()
+        self._cancel_callbacks = []
+
+    def path(self, filename):
+        """Path for a job-private artifact inside the workspace."""
+        return os.path.join(self.workspace, filename)
+
+    def emit(self, event, **data):
+        """Appends a progress event for streaming clients (see events_since)."""
+        with self._lock:
+            self.events.append({"seq": len(self.events), "event": event, "time": time.time(), **data})
+
+    def events_since(self, seq):
+        """Returns events with a sequence number >= seq."""
+        with self._lock:
+            return self.events[seq:]
+
+    def on_cancel(self, callback):
+        """Registers callback() to run when the job is cancelled (immediately if it already is)."""
+        with self._lock:
+            if not self._cancel_event.is_set():
+                self._cancel_callbacks.append(callback)
+                return
+        callback()
+
+    def cancel(self):
+        """Requests cancellation; in-flight work registered via on_cancel is cancelled too."""
+        with self._lock:
+            if self._cancel_event.is_set():
+                return
+            self._cancel_event.set()
+            callbacks, self._cancel_callbacks = self._cancel_callbacks, []
+        self.emit("cancel_requested")
+        for callback in callbacks:
+            callback()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled(f"Job {self.id} was cancelled")
+
+    @contextmanager
+    def stage(self, name):
+        """Records start/end time and outcome of a pipeline stage."""
+        info = {"status": "running", "started_at": time.time(), "finished_at": None, "duration_seconds": None}
+        with self._lock:
+            self.stages[name] = info
+        self.emit("stage_started", stage=name)
+        try:
+            yield info
+            info["status"] = "done"
+        except Exception:
+            info["status"] = "failed"
+            raise
+        finally:
+            info["finished_at"] = time.time()
+            info["duration_seconds"] = round(info["finished_at"] - info["started_at"], 3)
+            self.emit(f"stage_{info['status']}", stage=name, duration_seconds=info["duration_seconds"])
+
+    @property
+    def done(self):
+        return self.status in ("succeeded", "failed", "cancelled")
+
+    def to_dict(self):
+        with self._lock:
+            stages = {name: dict(info) for name, info in self.stages.items()}
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed_seconds": round(end - (self.started_at or self.created_at), 3),
+            "stages": stages,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """
+    Runs jobs on a bounded worker pool and keeps recent jobs for status polling.
+
+    Every job writes into its own workspace under JOBS_DIR, so concurrent
+    renders never share file names. Workspaces are deleted once their job
+    has been finished for workspace_retention seconds (or drops out of
+    history); leftovers from previous processes are swept the same way.
+    """
+
+    def __init__(self, max_workers=RENDER_WORKERS, queue_limit=RENDER_QUEUE_LIMIT, history_limit=JOB_HISTORY_LIMIT,
+                 workspace_retention=JOB_WORKSPACE_RETENTION):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="render")
+        self.queue_limit = queue_limit
+        self.history_limit = history_limit
+        self.workspace_retention = workspace_retention
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, kind="render"):
+        """
+        Queues fn(job, *args) and returns the Job immediately.
+        Raises JobQueueFull if too many jobs are waiting.
+        """
+        job = Job(kind)
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if j.status == "queued")
+            if pending >= self.queue_limit:
+                raise JobQueueFull(f"Render queue is full ({pending} jobs waiting)")
+            self._jobs[job.id] = job
+            self._prune()
+        job.future = self._pool.submit(self._run, job, fn, args)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Cancels a queued or running job and returns it (None if unknown).
+        Queued jobs never start; running ones stop at their next cancellation point.
+        """
+        job = self.get(job_id)
+        if job is None or job.done:
+            return job
+        job.cancel()
+        if job.future.cancel():
+            # Never started: finish it here since _run won't
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            job.emit("job_cancelled", result=None, error=None)
+        return job
+
+    def list(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _run(self, job, fn, args):
+        if job.cancelled:
+            # Cancelled after the worker picked it up but before it started
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            job.emit("job_cancelled", result=None, error=None)
+            return None
+        job.status = "running"
+        job.started_at = time.time()
+        os.makedirs(job.workspace, exist_ok=True)
+        job.emit("job_started")
+        try:
+            job.result = fn(job, *args)
+            job.status = "succeeded"
+        except Exception as e:
+            if job.cancelled:
+                print(f"Job {job.id} cancelled")
+                job.status = "cancelled"
+            else:
+                print(f"Job {job.id} failed: {type(e).__name__}: {e}")
+                job.error = str(e)
+                job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+        # Terminal event last, so streams can close once they see it
+        job.emit(f"job_{job.status}", result=job.result, error=job.error)
+        # Disk cleanup runs here on the worker thread; submit() is called from the event loop
+        self._sweep_workspaces()
+        return job.result
+
+    def _prune(self):
+        # Drop the oldest finished jobs once history grows past the limit
+        finished = [job_id for job_id, j in self._jobs.items() if j.done]
+        while len(self._jobs) > self.history_limit and finished:
+            self._jobs.pop(finished.pop(0), None)
+
+    def _sweep_workspaces(self):
+        """Deletes workspaces of jobs finished more than workspace_retention seconds ago."""
+        if not os.path.isdir(JOBS_DIR):
+            return
+        cutoff = time.time() - self.workspace_retention
+        with self._lock:
+            jobs = dict(self._jobs)
+        for entry in os.scandir(JOBS_DIR):
+            job = jobs.get(entry.name)
+            if job is not None:
+                expired = job.done and job.finished_at is not None and job.finished_at < cutoff
+            else:
+                # Pruned from history or left by an earlier process
+                try:
+                    expired = entry.stat().st_mtime < cutoff
+                except FileNotFoundError:
+                    continue
+            if expired:
+                shutil.rmtree(entry.path, ignore_errors=True)
@@ -1,16 +1,33 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from typing import Literal
 from script_brain import ScriptBrain
 from video_factory import VideoProvider
 from editor import VideoEditor
+from pipeline import RenderPipeline, output_url
+from jobs import JobManager, JobQueueFull
+from config import ASSEMBLY_ENGINE, RENDER_PROFILE
+from contextlib import asynccontextmanager
+import asyncio
+import json
 import os
 
-app = FastAPI(title="TradingWizard AI - Viral Video Engine")
+@asynccontextmanager
+async def lifespan(app):
+    trend_snapshot.start()
+    yield
+    trend_snapshot.stop()
+
+app = FastAPI(title="TradingWizard AI - Viral Video Engine", lifespan=lifespan)
 
 # Initialize Components
 brain = ScriptBrain()
 vision = VideoProvider()
 editor = VideoEditor()
+pipeline = RenderPipeline(vision, editor)
+jobs = JobManager()
 
 class ScriptRequest(BaseModel):
     topic: str
@@ -22,12 +39,14 @@ class VideoFromScriptRequest(BaseModel):
     topic: str
     model_tier: str = "budget"
     content_mode: str = "MEME"
+    assembly_engine: Literal["moviepy", "ffmpeg"] = ASSEMBLY_ENGINE
+    render_profile: Literal["draft", "preview", "final"] = RENDER_PROFILE
 
 @app.post("/generate_script")
 async def generate_script_endpoint(request: ScriptRequest):
     try:
         print(f"Step 1: Generating Script for '{request.topic}' in mode '{request.content_mode}'")
-        script_data = brain.generate_script(request.topic, request.content_mode)
+        script_data = await run_in_threadpool(brain.generate_script, request.topic, request.content_mode)
         if not script_data:
             raise HTTPException(status_code=500, detail="Failed to generate script")
         
@@ -36,81 +55,119 @@ async def generate_script_endpoint(request: ScriptRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/generate_video_from_script")
-async def generate_video_from_script_endpoint(request: VideoFromScriptRequest):
+async def generate_video_from_script_endpoint(request: VideoFromScriptRequest, http_request: Request):
+    """Runs the render as a job and waits for it (kept for clients that don't poll /jobs)."""
+    job = _submit_render(request)
+    finished = asyncio.wrap_future(job.future)
     try:
-        script_text = request.script
-        visual_prompts = request.visual_prompts
-        
-        if not script_text:
-             raise HTTPException(status_code=400, detail="Empty script provided")
-
-        # 2. Generate Video (Multi-Scene)
-        print(f"Step 2: Generating Videos for {len(visual_prompts)} scenes")
-        video_paths = []
-        
-        # Limit to 3 scenes to save time/cost for now
-        scenes_to_generate = visual_prompts[:3] if visual_prompts else [f"Abstract background for {request.topic}"]
-        
-        for i, prompt in enumerate(scenes_to_generate):
-            print(f"  - Generating Scene {i+1}: {prompt}")
-            video_url = vision.generate_video(prompt, request.model_tier)
-            
-            # Download video
-            if video_url.startswith("http"):
-                try:
-                    import requests
-                    response = requests.get(video_url)
-                    if response.status_code == 200:
-                        scene_path = os.path.join("output", f"scene_{i}_{request.topic.replace(' ', '_')}.mp4")
-                        with open(scene_path, "wb") as f:
-                            f.write(response.content)
-                        video_paths.append(scene_path)
-                    else:
-                        print(f"Failed to download video from {video_url}")
-                except Exception as e:
-                    print(f"Error downloading video: {e}")
-            else:
-                # Assume local path or mock
-                video_paths.append(video_url)
-
-        if not video_paths:
-             # Fallback to dummy if everything failed
-             print("Warning: No videos generated. Using fallback.")
-             video_paths.append("output/temp_background.mp4")
-
-        # 3. Generate Audio
-        print("Step 3: Generating Audio")
-        audio_path = editor.generate_audio(script_text)
-        
-        # 4. Assemble
-        print("Step 4: Assembling Final Asset")
-        
-        # We need at least one valid video file
-        valid_videos = [p for p in video_paths if os.path.exists(p)]
-        
-        if valid_videos:
-             final_output = editor.assemble_video(valid_videos, audio_path, script_text, f"viral_{request.content_mode}_{request.topic.replace(' ', '_')}.mp4")
-             return {"status": "success", "video_path": final_output}
-        else:
-             return {"status": "partial_success", "message": "Video generation failed (no local files), but script and audio created.", "audio_path": audio_path}
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        # Starlette never cancels a handler when its client hangs up, so poll for it:
+        # an abandoned render would otherwise keep its provider slots and the CPU
+        while not finished.done():
+            await asyncio.wait({finished}, timeout=1.0)
+            if not finished.done() and await http_request.is_disconnected():
+                print(f"Client disconnected; cancelling job {job.id}")
+                jobs.cancel(job.id)
+                raise HTTPException(status_code=409, detail="Client disconnected; job was cancelled")
+    except asyncio.CancelledError:
+        # Server shutdown: stop the render and its provider calls
+        jobs.cancel(job.id)
+        raise
+    if job.status == "cancelled":
+        raise HTTPException(status_code=409, detail="Job was cancelled")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    return job.result
+
+@app.post("/jobs", status_code=202)
+def submit_render_job(request: VideoFromScriptRequest):
+    """Queues a render and returns its job ID immediately."""
+    job = _submit_render(request)
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}",
+        "events_url": f"/jobs/{job.id}/events",
+    }
+
+@app.get("/jobs/{job_id}")
+def get_render_job(job_id: str):
+    job = jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.delete("/jobs/{job_id}", status_code=202)
+def cancel_render_job(job_id: str):
+    """Cancels a queued or running render, including its in-flight provider renders."""
+    job = jobs.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def stream_render_job(job_id: str, request: Request):
+    """
+    Server-Sent Events stream of a job's progress (stage, scene, audio,
+    captions and encode events). Reconnects resume from Last-Event-ID.
+    """
+    job = jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    last_id = request.headers.get("last-event-id")
+    start = int(last_id) + 1 if last_id and last_id.isdigit() else 0
+    return StreamingResponse(
+        _job_event_stream(job, start, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def _job_event_stream(job, seq, request):
+    idle = 0.0
+    while not await request.is_disconnected():
+        events = job.events_since(seq)
+        for event in events:
+            yield f"id: {event['seq']}\nevent: {event['event']}\ndata: {json.dumps(event)}\n\n"
+            seq = event["seq"] + 1
+        if events and events[-1]["event"] in ("job_succeeded", "job_failed", "job_cancelled"):
+            return
+        if events:
+            idle = 0.0
+        elif idle >= 15:
+            # Comment line keeps proxies from closing an idle stream
+            yield ": keep-alive\n\n"
+            idle = 0.0
+        await asyncio.sleep(0.25)
+        idle += 0.25
+
+def _submit_render(request):
+    if not request.script:
+        raise HTTPException(status_code=400, detail="Empty script provided")
+    try:
+        return jobs.submit(pipeline.run, request)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from trends import TrendSpotter
+from fastapi.responses import FileResponse, JSONResponse
+from datetime import datetime, timezone
+from trends import TrendSnapshot
+from media_files import MediaFiles
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
-app.mount("/output", StaticFiles(directory="output"), name="output")
+app.mount("/output", MediaFiles(directory="output"), name="output")  # byte ranges, ETag, cache policy
 
-# Initialize Trend Spotter
-spotter = TrendSpotter()
+# Trend snapshot, refreshed in the background (see lifespan)
+trend_snapshot = TrendSnapshot()
 
 @app.get("/trends")
 def get_trends():
-    return spotter.fetch_trending_topics()
+    snapshot = trend_snapshot.get()
+    return JSONResponse(snapshot["topics"], headers={
+        "X-Trends-Fetched-At": datetime.fromtimestamp(snapshot["fetched_at"], timezone.utc).isoformat(),
+        "X-Trends-Age": str(int(snapshot["age_seconds"])),
+        "X-Trends-Stale": "true" if snapshot["stale"] else "false",
+    })
 
 @app.get("/generate")
 def autonomous_generate():
@@ -121,7 +178,7 @@ def autonomous_generate():
     """
     from idea_generator import FinanceIdeaGenerator
     
-    generator = FinanceIdeaGenerator()
+    generator = FinanceIdeaGenerator(trend_snapshot=trend_snapshot)
     ideas = generator.generate_ideas()
     
     # Return pure JSON array (no wrapping object)
@@ -131,6 +188,37 @@ def autonomous_generate():
 def root():
     return FileResponse("static/index.html")
 
+@app.get("/renders")
+def list_renders(limit: int = 50):
+    """
+    Published renders, newest first, with poster and animated-preview URLs for the dashboard.
+    Missing previews are built in the background; their URLs are null until then.
+    """
+    return [
+        {
+            "name": os.path.basename(render["path"]),
+            "video_url": output_url(render["path"]),
+            "poster_url": output_url(render["poster"]),
+            "preview_url": output_url(render["preview"]),
+            "size_bytes": render["size_bytes"],
+            "modified_at": datetime.fromtimestamp(render["modified"], timezone.utc).isoformat(),
+        }
+        for render in editor.recent_renders(max(1, min(limit, 200)))
+    ]
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {
+        "scenes": pipeline.scene_cache.stats(),
+        "scripts": brain.script_cache.stats(),
+        "speech": editor.speech_cache.stats(),
+    }
+
+@app.get("/providers/stats")
+def provider_stats():
+    """Scene renders per model tier: concurrency limit, in flight, and waiting for a slot."""
+    return vision.runner.stats()
+
 @app.get("/health")
 def health_check():
     return {"status": "healthy", "persona": "Kai", "features": ["autonomous_generation", "video_creation"]}
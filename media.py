@@ -0,0 +1,180 @@
+import os
+import re
+import struct
+import subprocess
+import tempfile
+from moviepy.config import FFMPEG_BINARY
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+# <name>.<hex digest>.<ext> or <name>.<hex digest>.poster.jpg (see VideoEditor.publish)
+CONTENT_HASHED = re.compile(r"\.[0-9a-f]{12,64}\.")
+
+
+def probe(path):
+    """Video stream parameters that decide whether clips can be joined without re-encoding."""
+    info = ffmpeg_parse_infos(path)
+    width, height = info.get("video_size") or (0, 0)
+    return {
+        "path": path,
+        "codec": info.get("video_codec_name"),
+        "profile": info.get("video_profile"),
+        "width": width,
+        "height": height,
+        "fps": info.get("video_fps"),
+        "duration": info.get("video_duration") or info.get("duration") or 0.0,
+    }
+
+
+def compatible(probes):
+    """True if all clips share codec, profile, resolution and frame rate (stream-copy safe)."""
+    if not probes:
+        return False
+    first = probes[0]
+    return all(
+        p["codec"] == first["codec"]
+        and p["profile"] == first["profile"]
+        and (p["width"], p["height"]) == (first["width"], first["height"])
+        and p["fps"] and first["fps"] and abs(p["fps"] - first["fps"]) < 0.01
+        for p in probes
+    )
+
+
+def concat_copy(paths, output_path, duration=None):
+    """
+    Joins clips with the concat demuxer without re-encoding (video only).
+    duration cuts the result at the first packet past that time, so it can
+    run slightly long; callers trim frame-accurately when they encode.
+    """
+    args = ["-map", "0:v:0", "-an", "-c", "copy"]
+    if duration:
+        args += ["-t", f"{duration:.3f}"]
+    return _concat(paths, output_path, args)
+
+
+def concat_audio(paths, output_path):
+    """Joins audio files of the same format (e.g. TTS sentence MP3s) without re-encoding."""
+    return _concat(paths, output_path, ["-map", "0:a:0", "-vn", "-c", "copy"])
+
+
+def _concat(paths, output_path, args):
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as listing:
+        for path in paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            listing.write(f"file '{escaped}'\n")
+    try:
+        run_ffmpeg([FFMPEG_BINARY, "-y", "-hide_banner", "-loglevel", "error",
+                    "-f", "concat", "-safe", "0", "-i", listing.name] + args + [output_path])
+    finally:
+        os.remove(listing.name)
+    return output_path
+
+
+def normalize(path, output_path, width, height, fps, fit="pad", threads=0):
+    """
+    Re-encodes a clip once into the intermediate format used for stream-copy joins:
+    H.264 yuv420p at exactly width x height, constant fps, no audio.
+    fit: "pad" scales to fit and letterboxes (black), "crop" scales to fill and center-crops.
+    threads: x264 threads (0 = ffmpeg's choice); lower it when normalizing several clips at once.
+    """
+    if fit == "crop":
+        frame = f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height}"
+    else:
+        frame = (f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                 f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:black")
+    run_ffmpeg([
+        FFMPEG_BINARY, "-y", "-hide_banner", "-loglevel", "error", "-i", path,
+        "-vf", f"{frame},setsar=1,fps={fps},format=yuv420p",
+        "-an", "-c:v", "libx264", "-preset", "veryfast", "-crf", "18", "-threads", str(threads),
+        "-profile:v", "high", "-video_track_timescale", "90000",
+        output_path,
+    ])
+    return output_path
+
+
+def keyframe_params(fps):
+    """
+    x264 options for a keyframe every second. x264's default (250 frames) is
+    10-16 s at our frame rates, which leaves grab_frame's previews and poster
+    only one or two distinct frames to pick from on a short render.
+    """
+    return ["-g", str(max(1, round(fps)))]
+
+
+def grab_frame(path, seconds, width=None):
+    """
+    PNG bytes of the keyframe at or before `seconds`, optionally scaled to width.
+    The demuxer seeks straight to that keyframe and the decoder skips
+    everything else, so exactly one frame is decoded however long the video.
+    """
+    scale = ["-vf", f"scale={width}:-2"] if width else []
+    result = subprocess.run(
+        [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-noaccurate_seek", "-skip_frame", "nokey",
+         "-ss", f"{max(0.0, seconds):.3f}", "-i", path, "-frames:v", "1", "-an"]
+        # passthrough: the keyframe is timestamped before `seconds`, which constant-rate output would drop
+        + scale + ["-fps_mode", "passthrough", "-f", "image2pipe", "-c:v", "png", "-"],
+        capture_output=True,
+    )
+    if result.returncode != 0 or not result.stdout:
+        raise RuntimeError(f"ffmpeg could not grab a frame at {seconds:.2f}s from {path}: "
+                           f"{result.stderr.decode(errors='replace').strip()[-500:]}")
+    return result.stdout
+
+
+def moov_first(path):
+    """True if an MP4's moov atom (the index) comes before mdat, so players can start before the download ends."""
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return False
+            size, kind = struct.unpack(">I4s", header)
+            if kind == b"moov":
+                return True
+            if kind == b"mdat":
+                return False
+            if size == 1:  # 64-bit size follows the type
+                size = struct.unpack(">Q", f.read(8))[0] - 8
+            elif size < 8:  # 0 = runs to end of file (or a corrupt header)
+                return False
+            f.seek(size - 8, os.SEEK_CUR)
+
+
+def faststart(path):
+    """Moves an MP4's moov atom to the front in place (stream copy); no-op if it already is."""
+    if moov_first(path):
+        return path
+    tmp_path = path + ".faststart.mp4"
+    try:
+        run_ffmpeg([FFMPEG_BINARY, "-y", "-hide_banner", "-loglevel", "error", "-i", path,
+                    "-map", "0", "-c", "copy", "-movflags", "+faststart", tmp_path])
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+def scene_sequence(durations, target_duration):
+    """
+    Indices of scenes to play back-to-back until target_duration is covered,
+    cycling through the scenes in order.
+    """
+    sequence, total = [], 0.0
+    if not durations or max(durations) <= 0:
+        return [0] if durations else []
+    while total < target_duration:
+        for index, scene_duration in enumerate(durations):
+            if scene_duration <= 0:
+                continue
+            sequence.append(index)
+            total += scene_duration
+            if total >= target_duration:
+                break
+    return sequence
+
+
+def run_ffmpeg(cmd):
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed ({result.returncode}): {result.stderr.strip()[-2000:]}")
+    return result
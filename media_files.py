@@ -0,0 +1,38 @@
+import os
+from fastapi.staticfiles import StaticFiles
+from starlette.exceptions import HTTPException
+from config import CACHE_DIR, MEDIA_IMMUTABLE_MAX_AGE
+from media import CONTENT_HASHED
+
+
+class MediaFiles(StaticFiles):
+    """
+    StaticFiles for rendered media (the /output mount).
+
+    Starlette's FileResponse already answers byte ranges (206 with
+    Content-Range, If-Range, Accept-Ranges: bytes) and sets ETag and
+    Last-Modified, which StaticFiles turns into 304s. This adds caching
+    policy: content-hashed names never change, so browsers and CDNs may
+    keep them for MEDIA_IMMUTABLE_MAX_AGE without revalidating; anything
+    else (scene previews, unhashed renders) must be revalidated, which
+    costs a 304 rather than a download.
+    """
+
+    async def get_response(self, path, scope):
+        # Server-side caches are never served, even when CACHE_DIR is configured under the mount
+        full_path = os.path.realpath(os.path.join(self.directory, path))
+        cache_dir = os.path.realpath(CACHE_DIR)
+        if full_path == cache_dir or full_path.startswith(cache_dir + os.sep):
+            raise HTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        response.headers["Cache-Control"] = cache_control(os.path.basename(full_path))
+        return response
+
+
+def cache_control(filename):
+    if CONTENT_HASHED.search(filename):
+        return f"public, max-age={MEDIA_IMMUTABLE_MAX_AGE}, immutable"
+    return "no-cache"
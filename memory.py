@@ -0,0 +1,104 @@
+import os
+import threading
+
+_local = threading.local()
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_PROC = os.path.exists("/proc/self/task")
+
+
+class PeakRSS:
+    """
+    Samples the memory of one render while it runs (Linux /proc; None elsewhere).
+
+    process: this whole process. In the API server that includes every
+    other job running at the same time, so it is reported as the server's
+    peak, not the render's.
+    ffmpeg: the subprocesses this render started, i.e. the children of the
+    threads working on it (the one that entered the meter, plus any that
+    call attach()), summed per sample.
+    Render farm workers sample themselves with their own meter and hand
+    their peaks back through record().
+    """
+
+    def __init__(self, interval=0.2):
+        self.interval = interval
+        self.process_bytes = 0
+        self.ffmpeg_bytes = 0
+        self.farm_bytes = 0
+        self.farm_ffmpeg_bytes = 0
+        self._threads = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._outer = None
+
+    @staticmethod
+    def current():
+        """The meter entered on the calling thread, if any."""
+        return getattr(_local, "meter", None)
+
+    def attach(self):
+        """Counts the calling thread's subprocesses as this render's (e.g. as a thread pool initializer)."""
+        with self._lock:
+            self._threads.add(threading.get_native_id())
+
+    def record(self, peaks):
+        """Adds a farm worker's peaks() for one segment; a render's segments run at once, so they add up."""
+        with self._lock:
+            self.farm_bytes += peaks["process"]
+            self.farm_ffmpeg_bytes += peaks["ffmpeg"]
+
+    def __enter__(self):
+        self._outer, _local.meter = self.current(), self
+        self.attach()
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        _local.meter = self._outer
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        with self._lock:
+            threads = list(self._threads)
+        children = {pid for tid in threads for pid in _children(tid)}
+        self.process_bytes = max(self.process_bytes, _rss("self"))
+        self.ffmpeg_bytes = max(self.ffmpeg_bytes, sum(_rss(pid) for pid in children))
+
+    def peaks(self):
+        return {"process": self.process_bytes, "ffmpeg": self.ffmpeg_bytes}
+
+    def report(self):
+        return {
+            "server_peak_rss_mb": _mb(self.process_bytes),
+            "ffmpeg_peak_rss_mb": _mb(max(self.ffmpeg_bytes, self.farm_ffmpeg_bytes)),
+            "farm_workers_peak_rss_mb": _mb(self.farm_bytes) if self.farm_bytes else None,
+        }
+
+
+def _mb(size):
+    return round(size / 2 ** 20, 1) if _PROC else None
+
+
+def _children(tid):
+    try:
+        with open(f"/proc/self/task/{tid}/children") as f:
+            return [int(pid) for pid in f.read().split()]
+    except (OSError, ValueError):  # thread gone, or not Linux
+        return []
+
+
+def _rss(pid):
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):  # exited between listing and reading
+        return 0
@@ -0,0 +1,174 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from downloader import SceneDownloader, DownloadError
+from providers import ProviderError
+from cache import DiskCache
+from config import SCENE_CACHE_ENABLED, SCENE_CACHE_MAX_BYTES, OUTPUT_DIR
+
+
+class RenderPipeline:
+    """
+    Runs the VideoProvider -> VideoEditor pipeline for an approved script.
+    Each step is recorded as a stage on the job for status polling.
+    Intermediate files go to the job's workspace; only the final cut is
+    written to OUTPUT_DIR, under a name unique to the job.
+    """
+
+    def __init__(self, vision, editor):
+        self.vision = vision
+        self.editor = editor
+        self.downloader = SceneDownloader()
+        self.scene_cache = DiskCache("scenes", SCENE_CACHE_MAX_BYTES)
+
+    def run(self, job, request):
+        script_text = request.script
+        visual_prompts = request.visual_prompts
+
+        # 2. Generate Video (Multi-Scene, in parallel up to the tier's limit)
+        print(f"Step 2: Generating Videos for {len(visual_prompts)} scenes")
+
+        # Limit to 3 scenes to save time/cost for now
+        scenes_to_generate = visual_prompts[:3] if visual_prompts else [f"Abstract background for {request.topic}"]
+
+        with job.stage("scenes") as stage:
+            video_paths = self._generate_scenes(job, scenes_to_generate, request)
+            stage["count"] = len(video_paths)
+
+        if not video_paths:
+            # Fallback to dummy if everything failed
+            print("Warning: No videos generated. Using fallback.")
+            video_paths.append("output/temp_background.mp4")
+
+        # Canonical 9:16 format, so assembly reads uniform inputs and joins them by stream copy
+        with job.stage("normalize"):
+            video_paths = self.editor.normalize_scenes(video_paths, job.workspace)
+
+        job.raise_if_cancelled()
+
+        # 3. Generate Audio
+        print("Step 3: Generating Audio")
+        with job.stage("audio"):
+            speech = self.editor.generate_speech(script_text, output_path=job.path("voiceover.mp3"))
+        audio_path = speech["audio_path"]
+        job.emit("audio_done", audio_path=audio_path, cached=speech.get("cached", False))
+        # Captions aligned while the voiceover streamed in; assembly skips its own alignment
+        timings = (speech["words"], speech["source"]) if speech["words"] is not None else None
+
+        job.raise_if_cancelled()
+
+        # 4. Assemble
+        print("Step 4: Assembling Final Asset")
+
+        # We need at least one valid video file
+        valid_videos = [p for p in video_paths if os.path.exists(p)]
+
+        if not valid_videos:
+            return {"status": "partial_success", "message": "Video generation failed (no local files), but script and audio created.", "audio_path": audio_path}
+
+        # Drafts/previews get their own name so they never overwrite the final cut
+        suffix = "" if request.render_profile == "final" else f"_{request.render_profile}"
+        with job.stage("assembly"):
+            final_output = self.editor.assemble_video(
+                valid_videos, audio_path, script_text,
+                f"viral_{request.content_mode}_{_slug(request.topic)}_{job.id[:8]}{suffix}.mp4",
+                progress=job.emit,
+                engine=request.assembly_engine,
+                profile=request.render_profile,
+                timings=timings
+            )
+            if not final_output:
+                raise RuntimeError("Video assembly failed")
+            # Faststart + content-hashed name, so the /output mount can serve it as immutable
+            final_output = self.editor.publish(final_output)
+
+        # Poster + animated preview for the player and the renders dashboard (optional)
+        with job.stage("previews"):
+            previews = self.editor.generate_previews(final_output) or {}
+        return {
+            "status": "success",
+            "video_path": final_output,
+            "video_url": output_url(final_output),
+            "poster_url": output_url(previews.get("poster")),
+            "preview_url": output_url(previews.get("preview")),
+        }
+
+    def _generate_scenes(self, job, scenes_to_generate, request):
+        """
+        Starts every scene render at once (the provider runner enforces the tier's
+        limit) and downloads each one as it finishes, keeping scene order.
+        """
+        paths = [None] * len(scenes_to_generate)
+        renders = {}  # provider future -> (index, cache key, scene path)
+        for i, prompt in enumerate(scenes_to_generate):
+            scene_path = job.path(f"scene_{i}.mp4")
+            cache_key = self._scene_cache_key(prompt, request.model_tier)
+            if SCENE_CACHE_ENABLED and self.scene_cache.fetch(cache_key, scene_path):
+                print(f"  - Scene {i+1} served from cache: {prompt}")
+                paths[i] = scene_path
+                job.emit("scene_done", index=i, total=len(paths), path=scene_path, url=output_url(scene_path), cached=True)
+                continue
+            print(f"  - Generating Scene {i+1}: {prompt}")
+            future = self.vision.submit_video(prompt, request.model_tier)
+            # Abandoned jobs cancel their remote renders
+            job.on_cancel(future.cancel)
+            renders[future] = (i, cache_key, scene_path)
+
+        with ThreadPoolExecutor(max_workers=self.vision.concurrency_limit(request.model_tier)) as pool:
+            downloads = {}
+            for future in as_completed(renders):
+                i, cache_key, scene_path = renders[future]
+                job.raise_if_cancelled()
+                try:
+                    video_url = future.result()
+                except ProviderError as e:
+                    print(f"Scene {i+1} failed: {e}")
+                    job.emit("scene_done", index=i, total=len(paths), path=None, url=None)
+                    continue
+                downloads[pool.submit(self._fetch_scene, i, video_url, scene_path, cache_key)] = i
+
+            for future in as_completed(downloads):
+                i = downloads[future]
+                paths[i] = future.result()
+                job.emit("scene_done", index=i, total=len(paths), path=paths[i], url=output_url(paths[i]))
+        job.raise_if_cancelled()
+        return [path for path in paths if path]
+
+    def _scene_cache_key(self, prompt, model_tier):
+        # Whitespace/case differences don't change what the provider renders
+        normalized = " ".join(prompt.split()).casefold()
+        return DiskCache.make_key("scene", model_tier, self.vision.model_for(model_tier), normalized, {})
+
+    def _fetch_scene(self, i, video_url, scene_path, cache_key):
+        """Downloads a rendered scene. Returns a local path or None."""
+        # Download video (streamed to disk through the shared session)
+        if video_url.startswith("http"):
+            try:
+                download = self.downloader.download(video_url, scene_path)
+                print(f"  - Scene {i+1} downloaded: {download['bytes']} bytes, sha256 {download['sha256'][:12]}")
+                if SCENE_CACHE_ENABLED:
+                    self.scene_cache.put(cache_key, scene_path)
+                return scene_path
+            except DownloadError as e:
+                print(f"Failed to download video from {video_url}: {e}")
+            except Exception as e:
+                print(f"Error downloading video: {e}")
+            return None
+        else:
+            # Assume local path or mock
+            return video_url
+
+
+def output_url(path):
+    """URL of a file served from the /output mount, or None if it lives elsewhere."""
+    if not path:
+        return None
+    relative = os.path.relpath(os.path.abspath(path), OUTPUT_DIR)
+    if relative.startswith(".."):
+        return None
+    return "/output/" + relative.replace(os.sep, "/")
+
+
+def _slug(text):
+    # Safe file-name fragment from a free-form topic
+    return re.sub(r"[^\w-]+", "_", text).strip("_")[:60] or "video"
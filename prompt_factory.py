@@ -22,8 +22,8 @@ class PromptFactory:
             "pixar style, 3D animation, vibrant colors"
         ]
         
-    def _get_system_prompt(self, content_type: str, is_meme: bool):
-        """Generate system prompt for OpenAI based on content type"""
+    def _get_system_prompt(self, content_type: str, is_meme: bool | None):
+        """Generate system prompt for OpenAI based on content type (is_meme=None: tone set per topic)"""
         base_rules = """You are a viral finance content creator for TikTok/Reels.
 Target audience: retail traders, crypto bros, finance TikTok, meme traders, beginners and intermediates.
 
@@ -56,9 +56,14 @@ IMAGE REQUIREMENTS:
 - Can be realistic, 3D rendered, or illustrated
 - Must stop scroll - visually arresting"""
         
-        tone = "absurd, meme-friendly, exaggerated, comedic" if is_meme else "educational, serious, authoritative, fast-paced"
+        if is_meme is None:
+            return f"{base_rules}\n{specific}\n\nTONE: use the tone given for each topic"
         
-        return f"{base_rules}\n{specific}\n\nTONE for this prompt: {tone}"
+        return f"{base_rules}\n{specific}\n\nTONE for this prompt: {self._tone(is_meme)}"
+    
+    @staticmethod
+    def _tone(is_meme: bool) -> str:
+        return "absurd, meme-friendly, exaggerated, comedic" if is_meme else "educational, serious, authoritative, fast-paced"
     
     def create_video_prompt(self, topic: str, is_meme: bool = False) -> VideoPrompt:
         """Generate a single video prompt using OpenAI"""
@@ -174,12 +179,9 @@ Return JSON with these exact keys:
             print(f"Error generating image prompt: {e}")
             return self._create_fallback_image(topic, is_meme)
 
-    def create_kai_prompt(self, topic: str) -> VideoPrompt:
-        """Generate a 'Kai Zen' character video prompt"""
-        if not self.client:
-            return self._create_fallback_video(topic, is_meme=True)
-            
-        system_prompt = """You are the creator of 'Kai', the TradingWizard mascot.
+    def _get_kai_system_prompt(self):
+        """System prompt for 'Kai Zen' mascot videos"""
+        return """You are the creator of 'Kai', the TradingWizard mascot.
 CHARACTER: Kai is a tiny wizard with a floppy hat. He is calm, zen, and magical.
 ACTIVITY: He is often stacking pebbles, meditating, or interacting with trading charts in a peaceful, lofi way.
 VIBE: Lofi beats, slow motion, magical realism, cute but profound, zero emotion/stoic.
@@ -192,6 +194,13 @@ EXAMPLES:
 
 GOAL: Create a similar video prompt involving Kai and the given finance topic."""
 
+    def create_kai_prompt(self, topic: str) -> VideoPrompt:
+        """Generate a 'Kai Zen' character video prompt"""
+        if not self.client:
+            return self._create_fallback_video(topic, is_meme=True)
+            
+        system_prompt = self._get_kai_system_prompt()
+
         user_prompt = f"""Generate a Kai Zen video prompt about: {topic}
 
 Return JSON with these exact keys:
@@ -234,6 +243,228 @@ Return JSON with these exact keys:
             return self._create_fallback_video(topic, is_meme=True)
 
     
+    # --- Batch API: one request for N topics, per-item fallback ---
+
+    def create_video_prompts(self, items: list[tuple[str, bool]]) -> list[VideoPrompt]:
+        """
+        Generate video prompts for [(topic, is_meme), ...] in a single OpenAI request.
+        Items missing or invalid in the response fall back to create_video_prompt.
+        """
+        if not items:
+            return []
+        if not self.client:
+            return [self._create_fallback_video(topic, is_meme) for topic, is_meme in items]
+        
+        specs = [
+            {
+                "topic": topic,
+                "is_meme": is_meme,
+                "emotional_angle": random.choice(self.emotional_angles),
+                "duration": random.randint(5, 30),
+                "style_notes": random.choice(self.video_styles),
+            }
+            for topic, is_meme in items
+        ]
+        topic_lines = "\n".join(
+            f"{i}. Topic: {spec['topic']}\n"
+            f"   - Tone: {self._tone(spec['is_meme'])}\n"
+            f"   - Emotional angle: {spec['emotional_angle']}\n"
+            f"   - Duration: {spec['duration']} seconds\n"
+            f"   - Style: {spec['style_notes']}"
+            for i, spec in enumerate(specs, 1)
+        )
+        user_prompt = f"""Generate {len(specs)} viral TikTok video prompts, one for each numbered topic:
+
+{topic_lines}
+
+Requirements for every prompt:
+- Human-centered (show people, faces, emotions)
+- Cinematic and detailed
+
+Return JSON with a "prompts" array of exactly {len(specs)} objects, in topic order:
+{{
+  "prompts": [
+    {{
+      "index": 1,
+      "id": "short-kebab-case-id",
+      "hook": "one sentence hook for viewers",
+      "prompt": "detailed cinematic production prompt",
+      "cta_overlay": "optional call-to-action text or empty string"
+    }}
+  ]
+}}"""
+        
+        results = self._request_batch(self._get_system_prompt("video", None), user_prompt, len(specs))
+        
+        prompts = []
+        for spec, data in zip(specs, results):
+            try:
+                prompts.append(VideoPrompt(
+                    id=data.get("id") or self._generate_id(spec["topic"]),
+                    type="video",
+                    model="video-model",
+                    topic=spec["topic"],
+                    hook=data["hook"],
+                    prompt=data["prompt"],
+                    duration_seconds=spec["duration"],
+                    aspect_ratio="9:16",
+                    style_notes=spec["style_notes"],
+                    cta_overlay=data.get("cta_overlay") or "",
+                    language="en"
+                ))
+            except Exception as e:
+                print(f"Batch item invalid for '{spec['topic']}' ({e}), retrying individually")
+                prompts.append(self.create_video_prompt(spec["topic"], is_meme=spec["is_meme"]))
+        return prompts
+    
+    def create_image_prompts(self, items: list[tuple[str, bool]]) -> list[ImagePrompt]:
+        """
+        Generate image prompts for [(topic, is_meme), ...] in a single OpenAI request.
+        Items missing or invalid in the response fall back to create_image_prompt.
+        """
+        if not items:
+            return []
+        if not self.client:
+            return [self._create_fallback_image(topic, is_meme) for topic, is_meme in items]
+        
+        specs = [
+            {"topic": topic, "is_meme": is_meme, "emotional_angle": random.choice(self.emotional_angles)}
+            for topic, is_meme in items
+        ]
+        topic_lines = "\n".join(
+            f"{i}. Topic: {spec['topic']}\n"
+            f"   - Tone: {self._tone(spec['is_meme'])}\n"
+            f"   - Emotional angle: {spec['emotional_angle']}"
+            for i, spec in enumerate(specs, 1)
+        )
+        user_prompt = f"""Generate {len(specs)} viral TikTok image/thumbnail prompts, one for each numbered topic:
+
+{topic_lines}
+
+Requirements for every prompt:
+- Meme-friendly and scroll-stopping
+- High contrast, colorful, cinematic
+- Human-centered or character-focused
+
+Return JSON with a "prompts" array of exactly {len(specs)} objects, in topic order:
+{{
+  "prompts": [
+    {{
+      "index": 1,
+      "id": "short-kebab-case-id",
+      "hook": "one sentence hook for viewers",
+      "prompt": "detailed image generation prompt",
+      "style_notes": "brief style description",
+      "cta_overlay": "optional call-to-action text or empty string"
+    }}
+  ]
+}}"""
+        
+        results = self._request_batch(self._get_system_prompt("image", None), user_prompt, len(specs))
+        
+        prompts = []
+        for spec, data in zip(specs, results):
+            try:
+                prompts.append(ImagePrompt(
+                    id=data.get("id") or self._generate_id(spec["topic"]),
+                    type="image",
+                    model="gpt-image-1-mini",
+                    topic=spec["topic"],
+                    hook=data["hook"],
+                    prompt=data["prompt"],
+                    duration_seconds=0,
+                    aspect_ratio="9:16",
+                    style_notes=data.get("style_notes") or "meme friendly, high contrast",
+                    cta_overlay=data.get("cta_overlay") or "",
+                    language="en"
+                ))
+            except Exception as e:
+                print(f"Batch item invalid for '{spec['topic']}' ({e}), retrying individually")
+                prompts.append(self.create_image_prompt(spec["topic"], is_meme=spec["is_meme"]))
+        return prompts
+    
+    def create_kai_prompts(self, topics: list[str]) -> list[VideoPrompt]:
+        """
+        Generate 'Kai Zen' video prompts for several topics in a single OpenAI request.
+        Items missing or invalid in the response fall back to create_kai_prompt.
+        """
+        if not topics:
+            return []
+        if not self.client:
+            return [self._create_fallback_video(topic, is_meme=True) for topic in topics]
+        
+        topic_lines = "\n".join(f"{i}. {topic}" for i, topic in enumerate(topics, 1))
+        user_prompt = f"""Generate {len(topics)} Kai Zen video prompts, one for each numbered topic:
+
+{topic_lines}
+
+Return JSON with a "prompts" array of exactly {len(topics)} objects, in topic order:
+{{
+  "prompts": [
+    {{
+      "index": 1,
+      "id": "kai-zen-id",
+      "hook": "short zen/lofi hook",
+      "prompt": "full prompt describing tiny kai with floppy hat and pebbles",
+      "cta_overlay": "minimal text or empty"
+    }}
+  ]
+}}"""
+        
+        results = self._request_batch(self._get_kai_system_prompt(), user_prompt, len(topics))
+        
+        prompts = []
+        for topic, data in zip(topics, results):
+            try:
+                prompts.append(VideoPrompt(
+                    id=data.get("id") or f"kai-{self._generate_id(topic)}",
+                    type="video",
+                    model="video-model",
+                    topic=topic,
+                    hook=data["hook"],
+                    prompt=data["prompt"],
+                    duration_seconds=random.randint(8, 15),
+                    aspect_ratio="9:16",
+                    style_notes="lofi, zen, magical realism, 3d render, cute",
+                    cta_overlay=data.get("cta_overlay") or "",
+                    language="en"
+                ))
+            except Exception as e:
+                print(f"Batch item invalid for '{topic}' ({e}), retrying individually")
+                prompts.append(self.create_kai_prompt(topic))
+        return prompts
+    
+    def _request_batch(self, system_prompt: str, user_prompt: str, count: int) -> list[dict]:
+        """
+        Send one batch request and return `count` raw prompt dicts in topic order.
+        Slots the model skipped or garbled come back as {} so callers fall back per item.
+        """
+        results = [{} for _ in range(count)]
+        try:
+            response = self.client.chat.completions.create(
+                model="gpt-4o",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                response_format={"type": "json_object"},
+                timeout=30.0 + 10.0 * count  # longer output for bigger batches
+            )
+            items = json.loads(response.choices[0].message.content).get("prompts", [])
+        except Exception as e:
+            print(f"Error generating prompt batch: {e}")
+            return results
+        
+        for position, item in enumerate(items):
+            if not isinstance(item, dict):
+                continue
+            # Trust the model's index when it is valid, otherwise its position
+            index = item.get("index")
+            slot = index - 1 if isinstance(index, int) and 1 <= index <= count else position
+            if slot < count and not results[slot]:
+                results[slot] = item
+        return results
+
     def _generate_id(self, topic: str) -> str:
         """Generate a kebab-case ID from topic"""
         import re
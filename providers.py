@@ -0,0 +1,173 @@
+import asyncio
+import random
+import threading
+import time
+import uuid
+import replicate
+from config import PROVIDER_POLL_INITIAL, PROVIDER_POLL_MAX, PROVIDER_TIMEOUT
+
+
+class ProviderError(Exception):
+    """Raised when a provider rejects, fails or times out a render."""
+
+
+class Provider:
+    """
+    A long-running text-to-video backend with submit/poll/cancel semantics.
+
+    submit() returns an opaque handle immediately; poll() reports
+    {"status": "running" | "succeeded" | "failed" | "canceled", "url", "error"}.
+    All methods are coroutines and must not block the event loop.
+    """
+
+    name = "provider"
+
+    async def submit(self, prompt):
+        raise NotImplementedError
+
+    async def poll(self, handle):
+        raise NotImplementedError
+
+    async def cancel(self, handle):
+        pass
+
+
+class ReplicateProvider(Provider):
+    """Replicate predictions (async_create / async_reload / async_cancel)."""
+
+    def __init__(self, model, api_token):
+        self.name = f"replicate:{model}"
+        self.model = model
+        self.client = replicate.Client(api_token=api_token)
+
+    async def submit(self, prompt):
+        return await self.client.predictions.async_create(model=self.model, input={"prompt": prompt})
+
+    async def poll(self, prediction):
+        await prediction.async_reload()
+        if prediction.status == "succeeded":
+            output = prediction.output
+            # Replicate usually returns a URL or a list of URLs
+            return {"status": "succeeded", "url": output if isinstance(output, str) else output[0]}
+        if prediction.status in ("failed", "canceled"):
+            return {"status": prediction.status, "error": prediction.error}
+        return {"status": "running"}
+
+    async def cancel(self, prediction):
+        await prediction.async_cancel()
+
+
+class FakeProvider(Provider):
+    """
+    Local stand-in that "renders" for render_seconds and returns a fixed URL.
+    Used for tiers without credentials and in tests (fail=True simulates a failed render).
+    """
+
+    def __init__(self, url, render_seconds=2.0, fail=False, name="fake"):
+        self.name = name
+        self.url = url
+        self.render_seconds = render_seconds
+        self.fail = fail
+        self.submitted = {}  # handle -> submit time
+        self.cancelled = set()
+
+    async def submit(self, prompt):
+        handle = uuid.uuid4().hex
+        self.submitted[handle] = time.monotonic()
+        return handle
+
+    async def poll(self, handle):
+        if handle in self.cancelled:
+            return {"status": "canceled"}
+        if time.monotonic() - self.submitted[handle] < self.render_seconds:
+            return {"status": "running"}
+        del self.submitted[handle]
+        if self.fail:
+            return {"status": "failed", "error": "fake provider failure"}
+        return {"status": "succeeded", "url": self.url}
+
+    async def cancel(self, handle):
+        self.cancelled.add(handle)
+
+
+class ProviderRunner:
+    """
+    Drives provider renders as coroutines on one background event loop.
+
+    Each render holds a slot of its provider's semaphore from submit until
+    it finishes, and polls with exponential backoff (plus jitter), so any
+    number of in-flight renders costs a coroutine each instead of a blocked
+    thread. generate() returns a concurrent.futures.Future; cancelling it
+    cancels the remote prediction too.
+    """
+
+    def __init__(self, limits, poll_initial=PROVIDER_POLL_INITIAL, poll_max=PROVIDER_POLL_MAX,
+                 timeout=PROVIDER_TIMEOUT):
+        self.limits = limits  # provider key -> max renders in flight
+        self.poll_initial = poll_initial
+        self.poll_max = poll_max
+        self.timeout = timeout
+        self.in_flight = {}  # provider key -> renders submitted and not finished
+        self.waiting = {}  # provider key -> renders queued for a slot
+        self._loop = asyncio.new_event_loop()
+        self._semaphores = {}
+        self._thread = threading.Thread(target=self._loop.run_forever, name="providers", daemon=True)
+        self._thread.start()
+
+    def generate(self, key, provider, prompt):
+        """Starts a render; returns a Future resolving to the video URL (raises ProviderError)."""
+        return asyncio.run_coroutine_threadsafe(self._generate(key, provider, prompt), self._loop)
+
+    def stats(self):
+        return {"limits": dict(self.limits), "in_flight": dict(self.in_flight), "waiting": dict(self.waiting)}
+
+    async def _generate(self, key, provider, prompt):
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            semaphore = self._semaphores[key] = asyncio.Semaphore(max(1, self.limits.get(key, 1)))
+
+        self.waiting[key] = self.waiting.get(key, 0) + 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting[key] -= 1
+
+        self.in_flight[key] = self.in_flight.get(key, 0) + 1
+        handle = None
+        try:
+            handle = await provider.submit(prompt)
+            return await self._wait(provider, handle)
+        except asyncio.CancelledError:
+            if handle is not None:
+                print(f"Cancelling {provider.name} render")
+                await asyncio.shield(self._cancel(provider, handle))
+            raise
+        except ProviderError:
+            raise
+        except Exception as e:
+            raise ProviderError(f"{provider.name} error: {e}") from e
+        finally:
+            self.in_flight[key] -= 1
+            semaphore.release()
+
+    async def _wait(self, provider, handle):
+        deadline = self._loop.time() + self.timeout
+        delay = self.poll_initial
+        while True:
+            result = await provider.poll(handle)
+            if result["status"] == "succeeded":
+                return result["url"]
+            if result["status"] in ("failed", "canceled"):
+                raise ProviderError(f"{provider.name} render {result['status']}: {result.get('error')}")
+            if self._loop.time() >= deadline:
+                await self._cancel(provider, handle)
+                raise ProviderError(f"{provider.name} render timed out after {self.timeout:.0f}s")
+            await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+            delay = min(delay * 2, self.poll_max)
+
+    @staticmethod
+    async def _cancel(provider, handle):
+        try:
+            await provider.cancel(handle)
+        except Exception as e:
+            print(f"Error cancelling {provider.name} render: {e}")
@@ -0,0 +1,170 @@
+import math
+import multiprocessing
+import os
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import ExitStack
+from moviepy import VideoFileClip, vfx
+from moviepy.config import FFMPEG_BINARY
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+import media
+from captions import CaptionRenderer
+from compositor import FrameCompositor
+from config import RENDER_FARM_WORKERS, RENDER_FARM_MIN_SEGMENT
+from memory import PeakRSS
+
+
+def compose_timeline(clips, stitched_path, words, duration, settings, captions, watermark="TradingWizard AI"):
+    """
+    Builds the captioned, watermarked (video-only) MoviePy clip for the final cut.
+    Every clip that owns an ffmpeg reader is registered on the clips ExitStack.
+    """
+    # Downscaling happens in the ffmpeg reader, so frames arrive at the profile's size.
+    # The stitched file is opened once; looping seeks the same reader.
+    native_height = ffmpeg_parse_infos(stitched_path)["video_size"][1]
+    height = settings["height"] if settings["height"] and settings["height"] < native_height else native_height
+    stitched_video = clips.enter_context(VideoFileClip(stitched_path, audio=False, target_resolution=(None, height)))
+    scale = height / native_height
+
+    # Loop or cut to match audio
+    if stitched_video.duration < duration:
+        final_video = stitched_video.with_effects([vfx.Loop(duration=duration)])
+    else:
+        final_video = stitched_video.subclipped(0, duration)
+
+    # Subtitles and watermark, blended in place into one reused frame buffer
+    compositor = FrameCompositor(final_video.size, captions.scaled(scale), words,
+                                 watermark=watermark, watermark_size=max(1, round(30 * scale)))
+    return compositor.apply(final_video)
+
+
+class RenderFarm:
+    """
+    Renders the MoviePy timeline on several CPU cores.
+
+    The timeline is cut into frame-aligned segments; worker processes each
+    composite and encode one segment (video only, same x264 settings), and
+    the segments are joined with a stream-copy concat before the voiceover
+    is muxed in. Workers are spawned once and reused across renders; if one
+    dies, the pool is replaced on the next render.
+    """
+
+    def __init__(self, workers=RENDER_FARM_WORKERS, min_segment_seconds=RENDER_FARM_MIN_SEGMENT):
+        self.workers = workers
+        self.min_segment_seconds = min_segment_seconds
+        self._pool = None
+        self._pool_lock = threading.Lock()  # concurrent renders share one pool
+
+    def segments_for(self, duration, fps):
+        """Frame ranges [(start, end), ...] to render in parallel (one range if not worth splitting)."""
+        total = math.ceil(duration * fps - 1e-6)
+        count = max(1, min(self.workers, int(duration // self.min_segment_seconds)))
+        bounds = [round(total * i / count) for i in range(count + 1)]
+        return [(bounds[i], bounds[i + 1]) for i in range(count)]
+
+    def render(self, stitched_path, audio_path, words, output_path, duration, settings, captions, progress=None):
+        fps = settings["fps"]
+        segments = self.segments_for(duration, fps)
+        total_frames = segments[-1][1]
+        # Split x264 threads between the segments encoding at once
+        threads = max(1, settings["threads"] // min(len(segments), self.workers))
+        job = {
+            "stitched_path": stitched_path, "words": words, "duration": duration,
+            "settings": settings, "threads": threads, "style": captions.style(),
+        }
+        print(f"Rendering {total_frames} frames in {len(segments)} segment(s) across {self.workers} worker(s)")
+
+        with tempfile.TemporaryDirectory(prefix="farm_") as tmp_dir:
+            paths = [os.path.join(tmp_dir, f"segment_{i:03d}.mp4") for i in range(len(segments))]
+            futures = []
+            pool = self._executor()
+            try:
+                for (start, end), path in zip(segments, paths):
+                    futures.append(pool.submit(render_segment, job, start, end, path))
+                meter = PeakRSS.current()  # the render's; workers measure themselves and report back
+                done_frames = 0
+                for future in as_completed(futures):
+                    segment = future.result()
+                    done_frames += segment["frames"]
+                    if meter:
+                        meter.record(segment["rss"])
+                    if progress:
+                        progress("encode_progress", percent=min(100, int(100 * done_frames / total_frames)))
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM-killed) and the pool refuses all further work;
+                # drop it so the next render spawns a fresh one
+                self._discard_pool(pool)
+                raise
+            finally:
+                # If a segment failed, its siblings may still be writing into tmp_dir
+                for future in futures:
+                    future.cancel()
+                wait(futures)
+
+            joined = media.concat_copy(paths, os.path.join(tmp_dir, "joined.mp4"))
+            media.run_ffmpeg([
+                FFMPEG_BINARY, "-y", "-hide_banner", "-loglevel", "error",
+                "-i", joined, "-i", audio_path,
+                "-map", "0:v:0", "-map", "1:a:0", "-c:v", "copy", "-c:a", "aac",
+                "-t", f"{duration:.3f}", output_path,
+            ])
+        return output_path
+
+    def _executor(self):
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn: the parent runs event-loop and worker threads that must not be forked
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def _discard_pool(self, pool):
+        # Only if it is still current: another render may already have replaced it
+        with self._pool_lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+_renderers = {}  # per worker process: caption style -> CaptionRenderer (keeps its bounded glyph cache warm)
+
+
+def render_segment(job, start_frame, end_frame, output_path):
+    """
+    Worker: composites frames [start_frame, end_frame) and encodes them to output_path.
+    Returns the frame count and the worker's peak memory (its own and its ffmpeg processes').
+    """
+    style_key = tuple(sorted(job["style"].items()))
+    captions = _renderers.get(style_key)
+    if captions is None:
+        captions = _renderers[style_key] = CaptionRenderer(**job["style"])
+
+    settings, fps = job["settings"], job["settings"]["fps"]
+    # stderr goes to a file: a pipe nobody reads until the end could fill up and stall ffmpeg
+    with PeakRSS() as rss, ExitStack() as clips, tempfile.TemporaryFile() as stderr:
+        final = compose_timeline(clips, job["stitched_path"], job["words"], job["duration"], settings, captions)
+        width, height = final.size
+        encoder = subprocess.Popen([
+            FFMPEG_BINARY, "-y", "-hide_banner", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+            "-c:v", "libx264", "-preset", settings["preset"], "-crf", str(settings["crf"]),
+            "-threads", str(job["threads"]), "-pix_fmt", "yuv420p", "-video_track_timescale", "90000",
+            *media.keyframe_params(fps),
+            output_path,
+        ], stdin=subprocess.PIPE, stderr=stderr)
+        try:
+            for index in range(start_frame, end_frame):
+                # Clamp so float rounding never asks for a frame past the end
+                frame = final.get_frame(min(index / fps, job["duration"] - 1e-3))
+                encoder.stdin.write(frame)  # the compositor's contiguous uint8 buffer, no copy
+        finally:
+            encoder.stdin.close()
+            if encoder.wait() != 0:
+                stderr.seek(0)
+                raise RuntimeError(f"ffmpeg failed ({encoder.returncode}): "
+                                   f"{stderr.read().decode(errors='replace')[-2000:]}")
+    return {"frames": end_frame - start_frame, "rss": rss.peaks()}
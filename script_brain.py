@@ -1,7 +1,9 @@
+import copy
 import json
 import os
 from openai import OpenAI
-from config import OPENAI_API_KEY
+from cache import MemoryCache
+from config import OPENAI_API_KEY, SCRIPT_CACHE_TTL, SCRIPT_CACHE_MAX_ENTRIES
 
 
 class ScriptBrain:
@@ -11,7 +13,7 @@ class ScriptBrain:
             self.client = OpenAI(api_key=OPENAI_API_KEY)
         else:
             self.client = None
-
+        self.script_cache = MemoryCache(ttl=SCRIPT_CACHE_TTL, max_entries=SCRIPT_CACHE_MAX_ENTRIES)
 
     def _get_system_prompt(self, mode):
         base_prompt = (
@@ -59,10 +61,22 @@ class ScriptBrain:
             return base_prompt
 
     def generate_script(self, topic, mode="MEME"):
+        """
+        Returns the script dict for (topic, mode), reusing a recent result.
+        Identical concurrent calls wait on a single OpenAI request.
+        """
         if not self.client:
             print("Error: OPENAI_API_KEY not set.")
             return None
+        if SCRIPT_CACHE_TTL <= 0:
+            return self._generate_script(topic, mode)
+
+        key = (self.model, " ".join(topic.split()).casefold(), mode)
+        script = self.script_cache.get_or_load(key, lambda: self._generate_script(topic, mode))
+        # Callers may edit the script; keep the cached copy pristine
+        return copy.deepcopy(script)
 
+    def _generate_script(self, topic, mode):
         system_prompt = self._get_system_prompt(mode)
         
         try:
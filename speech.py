@@ -0,0 +1,125 @@
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+import media
+from aligner import EnergyAligner
+from config import TTS_CONCURRENCY, TTS_CHUNK_SIZE
+
+
+class SpeechSynthesizer:
+    """
+    Voiceover synthesis with word timings, sentence by sentence.
+
+    Each sentence is streamed from OpenAI TTS straight to disk and, as soon
+    as its audio is complete, aligned in the same worker while later
+    sentences are still being synthesized. The sentence files are then
+    joined without re-encoding and the word timings shifted onto the
+    joined timeline, so captions are ready when the voiceover is.
+
+    Aligners:
+    - "local": EnergyAligner maps the known sentence onto its audio, offline
+    - "whisper": word timestamps from whisper-1, one small upload per sentence
+    - "linear": spreads each sentence's words evenly over its own audio (no upload)
+    - None: audio only
+    """
+
+    def __init__(self, client, model="tts-1", voice="onyx", speed=1.1, concurrency=TTS_CONCURRENCY):
+        self.client = client
+        self.model = model
+        self.voice = voice
+        self.speed = speed
+        self.concurrency = concurrency
+        self.aligner = EnergyAligner()
+
+    def synthesize(self, text, output_path, aligner="local"):
+        """
+        Writes the voiceover for text to output_path.
+        Returns {"audio_path", "words", "source"}; words is None when aligner is None.
+        """
+        sentences = split_sentences(text)
+        if not sentences:
+            raise ValueError("Nothing to synthesize")
+
+        # Next to the output, so the single-sentence os.replace never crosses filesystems (EXDEV)
+        with tempfile.TemporaryDirectory(prefix="tts_", dir=os.path.dirname(os.path.abspath(output_path))) as tmp_dir:
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="tts") as pool:
+                parts = list(pool.map(
+                    lambda item: self._sentence(item[1], os.path.join(tmp_dir, f"part_{item[0]:03d}.mp3"), aligner),
+                    enumerate(sentences),
+                ))
+            if len(parts) == 1:
+                os.replace(parts[0]["path"], output_path)
+            else:
+                media.concat_audio([part["path"] for part in parts], output_path)
+
+        if not aligner:
+            return {"audio_path": output_path, "words": None, "source": None}
+
+        # Shift each sentence's timings by the audio that precedes it
+        words, offset = [], 0.0
+        for part in parts:
+            words += [{"word": w["word"], "start": w["start"] + offset, "end": w["end"] + offset} for w in part["words"]]
+            offset += part["duration"]
+        sources = {part["source"] for part in parts}
+        return {"audio_path": output_path, "words": words, "source": sources.pop() if len(sources) == 1 else "mixed"}
+
+    def _sentence(self, sentence, path, aligner):
+        self._stream_tts(sentence, path)
+        duration = ffmpeg_parse_infos(path)["duration"]
+        words, source = [], None
+        if aligner == "local":
+            words, source = self._local_words(path, sentence), "local"
+        elif aligner == "whisper":
+            words, source = self._whisper_words(path), "whisper"
+        if aligner and not words:
+            words, source = linear_timings(sentence, duration), "linear"
+        return {"path": path, "duration": duration, "words": words, "source": source}
+
+    def _stream_tts(self, sentence, path):
+        # Chunks are written as they arrive instead of buffering the whole response
+        with self.client.audio.speech.with_streaming_response.create(
+            model=self.model, voice=self.voice, input=sentence, speed=self.speed, response_format="mp3",
+        ) as response:
+            with open(path, "wb") as f:
+                for chunk in response.iter_bytes(TTS_CHUNK_SIZE):
+                    f.write(chunk)
+
+    def _local_words(self, path, sentence):
+        try:
+            return self.aligner.align(path, sentence)
+        except Exception as e:
+            print(f"Error aligning sentence locally: {e}")
+            return []
+
+    def _whisper_words(self, path):
+        try:
+            with open(path, "rb") as audio_file:
+                transcript = self.client.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=audio_file,
+                    response_format="verbose_json",
+                    timestamp_granularities=["word"]
+                )
+            return [{"word": w.word, "start": w.start, "end": w.end} for w in transcript.words or []]
+        except Exception as e:
+            print(f"Error aligning sentence with Whisper: {e}")
+            return []
+
+
+def split_sentences(text):
+    """Splits a script into sentences on ., ! and ? (keeping the punctuation)."""
+    return [s.strip() for s in re.split(r"(?<=[.!?])\s+", text.strip()) if s.strip()]
+
+
+def linear_timings(text, duration, offset=0.0):
+    """Spreads the words of text evenly over duration seconds."""
+    words = text.split()
+    if not words:
+        return []
+    per_word = duration / len(words)
+    return [
+        {"word": word, "start": offset + i * per_word, "end": offset + (i + 1) * per_word}
+        for i, word in enumerate(words)
+    ]
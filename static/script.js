@@ -12,8 +12,9 @@ document.addEventListener('DOMContentLoaded', () => {
     // State
     let selectedMode = 'MEME';
 
-    // 1. Fetch Trends on Load
+    // 1. Fetch Trends and Recent Renders on Load
     fetchTrends();
+    fetchRenders();
 
     // 2. Mode Selection Logic
     modeCards.forEach(card => {
@@ -102,7 +103,7 @@ document.addEventListener('DOMContentLoaded', () => {
         log(`> Model: ${modelTier}`, 'info');
 
         try {
-            const response = await fetch('/generate_video_from_script', {
+            const response = await fetch('/jobs', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({
@@ -119,20 +120,21 @@ document.addEventListener('DOMContentLoaded', () => {
                 throw new Error(err.detail || 'Video generation failed');
             }
 
-            const data = await response.json();
+            const job = await response.json();
+            log(`> Job queued: ${job.job_id}`, 'info');
+
+            const result = await followJob(job.events_url);
+
+            if (result.status !== 'success') {
+                log(`> ${result.message}`, 'error');
+                return;
+            }
 
-            log('> Video assets generated.', 'success');
-            log('> Audio synthesized.', 'success');
-            log('> Final cut assembled.', 'success');
             log('> GENERATION COMPLETE.', 'success');
 
             // Show Result
-            const filename = data.video_path.split('/').pop();
-            const videoUrl = `/output/${filename}`;
-
-            finalVideo.src = videoUrl;
-            downloadLink.href = videoUrl;
-            resultContainer.classList.remove('hidden');
+            showVideo(result.video_url, result.poster_url);
+            fetchRenders();
 
             // Reset View
             scriptReviewPanel.style.display = 'none';
@@ -191,6 +193,107 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    // Helper: Follow a render job's server-sent events until it finishes.
+    // EventSource reconnects with Last-Event-ID, so a dropped connection
+    // resumes the stream instead of re-running the job.
+    function followJob(eventsUrl) {
+        return new Promise((resolve, reject) => {
+            const source = new EventSource(eventsUrl);
+            let encodeLine = null;
+
+            source.addEventListener('stage_started', e => {
+                const data = JSON.parse(e.data);
+                log(`> Stage started: ${data.stage}`, 'system');
+            });
+            source.addEventListener('stage_done', e => {
+                const data = JSON.parse(e.data);
+                log(`> Stage done: ${data.stage} (${data.duration_seconds}s)`, 'success');
+            });
+            source.addEventListener('scene_done', e => {
+                const data = JSON.parse(e.data);
+                if (data.path) {
+                    log(`> Scene ${data.index + 1}/${data.total} ready.`, 'success');
+                    // Preview the raw scene while the final cut renders
+                    if (data.url) showVideo(data.url);
+                } else {
+                    log(`> Scene ${data.index + 1}/${data.total} failed.`, 'error');
+                }
+            });
+            source.addEventListener('audio_done', () => log('> Audio synthesized.', 'success'));
+            source.addEventListener('captions_done', e => {
+                const data = JSON.parse(e.data);
+                log(`> Captions aligned: ${data.words} words (${data.source}).`, 'success');
+            });
+            source.addEventListener('encode_progress', e => {
+                const data = JSON.parse(e.data);
+                if (!encodeLine) encodeLine = log('> Encoding: 0%', 'info');
+                encodeLine.textContent = `> Encoding: ${data.percent}%`;
+            });
+            source.addEventListener('assembly_stats', e => {
+                const data = JSON.parse(e.data);
+                const farm = data.farm_workers_peak_rss_mb ? `, render workers ${data.farm_workers_peak_rss_mb} MB` : '';
+                log(`> Peak memory: ffmpeg ${data.ffmpeg_peak_rss_mb} MB${farm} (server ${data.server_peak_rss_mb} MB).`, 'info');
+            });
+            source.addEventListener('job_succeeded', e => {
+                source.close();
+                resolve(JSON.parse(e.data).result);
+            });
+            source.addEventListener('job_failed', e => {
+                source.close();
+                reject(new Error(JSON.parse(e.data).error || 'Video generation failed'));
+            });
+            source.addEventListener('job_cancelled', () => {
+                source.close();
+                reject(new Error('Render cancelled'));
+            });
+            // Dropped connections reconnect on their own (CONNECTING); CLOSED means the
+            // browser gave up, e.g. the job is gone after a restart and the stream 404s
+            source.onerror = () => {
+                if (source.readyState === EventSource.CLOSED) {
+                    reject(new Error('Lost the render job (server restarted or job expired)'));
+                }
+            };
+        });
+    }
+
+    // Helper: Fetch recent renders (posters only; no video is loaded until clicked)
+    async function fetchRenders() {
+        const rendersGrid = document.getElementById('rendersGrid');
+        try {
+            const res = await fetch('/renders?limit=24');
+            const renders = await res.json();
+            if (!renders.length) return;
+
+            rendersGrid.innerHTML = '';
+            renders.forEach(render => {
+                const thumb = document.createElement('img');
+                thumb.className = 'render-thumb';
+                thumb.loading = 'lazy';
+                thumb.alt = render.name;
+                thumb.title = render.name;
+                thumb.src = render.poster_url || '';
+                // Animated preview while hovered
+                if (render.preview_url) {
+                    thumb.addEventListener('mouseenter', () => { thumb.src = render.preview_url; });
+                    thumb.addEventListener('mouseleave', () => { thumb.src = render.poster_url || ''; });
+                }
+                thumb.addEventListener('click', () => showVideo(render.video_url, render.poster_url));
+                rendersGrid.appendChild(thumb);
+            });
+        } catch (e) {
+            log('> Failed to fetch recent renders.', 'error');
+        }
+    }
+
+    // Helper: Show a finished render
+    function showVideo(videoUrl, posterUrl = null) {
+        if (posterUrl) finalVideo.poster = posterUrl;
+        else finalVideo.removeAttribute('poster');
+        finalVideo.src = videoUrl;
+        downloadLink.href = videoUrl;
+        resultContainer.classList.remove('hidden');
+    }
+
     // Helper: Logger
     function log(msg, type = 'info') {
         const line = document.createElement('div');
@@ -198,5 +301,6 @@ document.addEventListener('DOMContentLoaded', () => {
         line.textContent = msg;
         terminalOutput.appendChild(line);
         terminalOutput.scrollTop = terminalOutput.scrollHeight;
+        return line;
     }
 });
@@ -1,18 +1,41 @@
 from pytrends.request import TrendReq
+import json
+import os
 import random
+import threading
+import time
 from datetime import datetime
+from config import TREND_REFRESH_SECONDS, TREND_RETRY_SECONDS, TREND_SNAPSHOT_PATH
+
+
+class TrendFetchError(Exception):
+    """Google Trends could not be fetched; .topics holds the list built with fallback search topics."""
+
+    def __init__(self, message, topics):
+        super().__init__(message)
+        self.topics = topics
 
 
 class TrendSpotter:
     def __init__(self):
-        self.pytrends = TrendReq(hl='en-US', tz=360)
+        self._pytrends = None
 
-    def fetch_trending_topics(self):
+    @property
+    def pytrends(self):
+        # TrendReq contacts Google when constructed, so defer it until the first fetch
+        if self._pytrends is None:
+            self._pytrends = TrendReq(hl='en-US', tz=360)
+        return self._pytrends
+
+    def fetch_trending_topics(self, strict=False):
         """
         Fetches trending financial topics with detailed metadata.
         Returns list of dicts with: topic, source, score, category
+        If Google Trends fails, canned fallback search topics are used instead;
+        with strict=True a TrendFetchError (carrying that list) is raised.
         """
         trends = []
+        google_error = None
         
         # Google Trends (Real)
         try:
@@ -34,6 +57,7 @@ class TrendSpotter:
                             })
         except Exception as e:
             print(f"Error fetching Google Trends: {e}")
+            google_error = e
             # Fallback trends
             fallback = [
                 "Bitcoin halving 2024",
@@ -110,14 +134,17 @@ class TrendSpotter:
         
         # Sort by score and return
         trends.sort(key=lambda x: x['score'], reverse=True)
+        if strict and google_error is not None:
+            raise TrendFetchError(f"Google Trends unavailable: {google_error}", trends)
         return trends
 
-    def get_high_potential_topics(self, count_range=(5, 15)):
+    def get_high_potential_topics(self, count_range=(5, 15), trends=None):
         """
         Get high potential topics for video generation.
         Ensures mix of educational and meme content.
+        trends: Optional pre-fetched fetch_trending_topics() result (e.g. from a TrendSnapshot).
         """
-        all_trends = self.fetch_trending_topics()
+        all_trends = trends if trends is not None else self.fetch_trending_topics()
         
         # Separate by category
         meme_trends = [t for t in all_trends if t['category'] in ['meme', 'story']]
@@ -141,6 +168,127 @@ class TrendSpotter:
         return selected[:target_count]
 
 
+class TrendSnapshot:
+    """
+    Latest fetch_trending_topics() result, kept in memory and on disk and
+    refreshed by a background thread every `interval` seconds.
+
+    Reads never wait on pytrends once a snapshot exists: a stale snapshot is
+    served as-is while a refresh runs in the background (stale-while-revalidate).
+    A failed refresh (e.g. rate limiting) keeps the previous snapshot, served
+    as stale, and is retried after `retry` seconds; fallback topics are only
+    used, in memory, when there is no snapshot at all.
+    """
+
+    def __init__(self, spotter=None, interval=TREND_REFRESH_SECONDS, path=TREND_SNAPSHOT_PATH,
+                 retry=TREND_RETRY_SECONDS):
+        self.spotter = spotter or TrendSpotter()
+        self.interval = interval
+        self.retry = retry
+        self._failed_at = None  # time of the last failed refresh, None after a success
+        self.path = path
+        self._snapshot = self._load()
+        self._fetch_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Starts the periodic background refresher."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="trend-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def get(self):
+        """
+        Returns {"fetched_at", "age_seconds", "stale", "topics"}.
+        Only blocks when no snapshot exists yet (first run, nothing on disk).
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.refresh()
+        age = time.time() - snapshot["fetched_at"]
+        stale = age >= self.interval or snapshot.get("fallback", False)
+        if stale:
+            self._refresh_in_background()
+        return {**snapshot, "age_seconds": round(age, 3), "stale": stale}
+
+    def topics(self):
+        return self.get()["topics"]
+
+    def refresh(self):
+        """Fetches trends now and replaces the snapshot (memory and disk); keeps it if the fetch fails."""
+        requested_at = time.time()
+        with self._fetch_lock:
+            snapshot = self._snapshot
+            # Another thread finished a fetch while we waited for the lock
+            if snapshot and snapshot["fetched_at"] >= requested_at and not snapshot.get("fallback"):
+                return snapshot
+            try:
+                topics = self.spotter.fetch_trending_topics(strict=True)
+            except TrendFetchError as e:
+                self._failed_at = time.time()
+                if snapshot is None or snapshot.get("fallback"):
+                    # Nothing real to serve yet: fallback topics, never saved, always stale
+                    snapshot = self._snapshot = {"fetched_at": time.time(), "topics": e.topics, "fallback": True}
+                else:
+                    print(f"Keeping trend snapshot from {datetime.fromtimestamp(snapshot['fetched_at'])}: {e}")
+                return snapshot
+            self._failed_at = None
+            snapshot = {"fetched_at": time.time(), "topics": topics}
+            self._snapshot = snapshot
+            self._save(snapshot)
+            return snapshot
+
+    def _retry_pending(self):
+        return self._failed_at is not None and time.time() - self._failed_at < self.retry
+
+    def _refresh_in_background(self):
+        if self._fetch_lock.locked() or self._retry_pending():
+            return
+        threading.Thread(target=self.refresh, name="trend-revalidate", daemon=True).start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.get("fallback") or time.time() - snapshot["fetched_at"] >= self.interval:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"Error refreshing trend snapshot: {e}")
+                snapshot = self._snapshot
+            if self._failed_at is not None:
+                # Last refresh failed: the old snapshot stays up, try again later
+                self._stop.wait(self.retry)
+                continue
+            # Sleep until this snapshot goes stale
+            age = time.time() - snapshot["fetched_at"] if snapshot else 0
+            self._stop.wait(max(1.0, self.interval - age))
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                snapshot = json.load(f)
+            if isinstance(snapshot.get("topics"), list) and "fetched_at" in snapshot:
+                return snapshot
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def _save(self, snapshot):
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Error saving trend snapshot: {e}")
+
+
 if __name__ == "__main__":
     spotter = TrendSpotter()
     print("All Trending Topics:")
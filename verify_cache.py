@@ -0,0 +1,90 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from cache import MemoryCache
+
+
+def test_single_flight():
+    print("\n--- Testing MemoryCache single-flight ---")
+    cache = MemoryCache(ttl=60, max_entries=10)
+    calls = []
+    release = threading.Event()
+
+    def loader():
+        calls.append(1)
+        release.wait(5)
+        return "script"
+
+    # 1. Concurrent lookups for one key share a single loader call
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(cache.get_or_load, "topic", loader) for _ in range(8)]
+        deadline = time.monotonic() + 5
+        while cache.stats()["coalesced"] < 7 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        results = [f.result(timeout=5) for f in futures]
+    print(f"Loader calls: {len(calls)}, stats: {cache.stats()}")
+    assert results == ["script"] * 8
+    assert len(calls) == 1
+    assert cache.stats()["misses"] == 1 and cache.stats()["coalesced"] == 7
+    assert cache.stats()["in_flight"] == 0
+
+    # 2. Later lookups are hits
+    assert cache.get_or_load("topic", loader) == "script"
+    assert len(calls) == 1 and cache.stats()["hits"] == 1
+
+
+def test_failures_and_expiry():
+    print("\n--- Testing MemoryCache failures, TTL and eviction ---")
+    cache = MemoryCache(ttl=0.2, max_entries=2)
+
+    # 1. None (a failed generation) is returned but not cached
+    assert cache.get_or_load("a", lambda: None) is None
+    assert cache.get_or_load("a", lambda: "retry") == "retry"
+
+    # 2. A loader exception reaches the waiting callers and is not cached
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise RuntimeError("provider down")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(cache.get_or_load, "b", failing)
+        while cache.stats()["in_flight"] == 0:
+            time.sleep(0.01)
+        follower = pool.submit(cache.get_or_load, "b", lambda: "unused")
+        while cache.stats()["coalesced"] == 0:
+            time.sleep(0.01)
+        release.set()
+        for future in (leader, follower):
+            try:
+                future.result(timeout=5)
+                raise AssertionError("loader error was swallowed")
+            except RuntimeError as e:
+                print(f"Caller saw: {e}")
+    assert cache.get_or_load("b", lambda: "recovered") == "recovered"
+
+    # 3. Entries expire after the TTL
+    time.sleep(0.25)
+    assert cache.get_or_load("b", lambda: "fresh") == "fresh"
+
+    # 4. Least recently used entries are evicted past max_entries
+    cache.set("c", 1)
+    cache.set("d", 2)
+    assert cache.stats()["entries"] == 2
+    assert cache.get_or_load("b", lambda: "reloaded") == "reloaded"
+    print(f"Stats: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    try:
+        test_single_flight()
+        test_failures_and_expiry()
+        print("\nCACHE VERIFICATION PASSED")
+    except AssertionError as e:
+        print(f"\nCACHE VERIFICATION FAILED: {e}")
+        exit(1)
+    except Exception as e:
+        print(f"\nERROR: {type(e).__name__}: {e}")
+        exit(1)
@@ -0,0 +1,146 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from downloader import DownloadError, SceneDownloader
+
+DATA = os.urandom(300 * 1024)
+requests_seen = []
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Serves DATA with Range support; /flaky drops the first response halfway, /unsized sends no length,
+    /drop hangs up without a response and /busy always answers 503.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        match = re.match(r"bytes=(\d+)-", self.headers.get("Range", ""))
+        offset = int(match.group(1)) if match else 0
+        requests_seen.append((self.path, offset))
+
+        if self.path == "/drop":
+            # Accept the connection, then hang up without answering
+            self.close_connection = True
+            return
+        if self.path == "/busy":
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if offset >= len(DATA):
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{len(DATA)}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = DATA[offset:]
+        self.send_response(206 if offset else 200)
+        if offset:
+            self.send_header("Content-Range", f"bytes {offset}-{len(DATA) - 1}/{len(DATA)}")
+        if self.path == "/unsized":
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        else:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        if self.path == "/flaky" and sum(1 for p, _ in requests_seen if p == "/flaky") == 1:
+            # Cut the first response off mid-body
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        pass  # the size-limit checks hang up mid-response on purpose
+
+
+def test_downloader(base_url, work_dir):
+    print("\n--- Testing SceneDownloader ---")
+    digest = hashlib.sha256(DATA).hexdigest()
+    downloader = SceneDownloader(chunk_size=16 * 1024, max_bytes=1024 * 1024, timeout=5, retries=2)
+
+    # 1. Plain download, checksum verified
+    dest = os.path.join(work_dir, "plain.mp4")
+    result = downloader.download(f"{base_url}/video", dest, expected_sha256=digest)
+    print(f"Plain: {result['bytes']} bytes, resumed={result['resumed']}")
+    assert result["sha256"] == digest and not result["resumed"]
+    assert open(dest, "rb").read() == DATA and not os.path.exists(dest + ".part")
+
+    # 2. An interrupted body is resumed with a Range request
+    requests_seen.clear()
+    dest = os.path.join(work_dir, "flaky.mp4")
+    result = downloader.download(f"{base_url}/flaky", dest, expected_sha256=digest)
+    print(f"Flaky: requests {requests_seen}, resumed={result['resumed']}")
+    assert result["resumed"] and len(requests_seen) == 2 and requests_seen[1][1] > 0
+    assert open(dest, "rb").read() == DATA
+
+    # 3. A part file that is already complete gets a 416 and is kept
+    dest = os.path.join(work_dir, "complete.mp4")
+    with open(dest + ".part", "wb") as f:
+        f.write(DATA)
+    result = downloader.download(f"{base_url}/video", dest, expected_sha256=digest)
+    print(f"Complete part file: resumed={result['resumed']}")
+    assert result["resumed"] and open(dest, "rb").read() == DATA
+
+    # 4. Oversized downloads are refused up front (Content-Length) or mid-stream (no length)
+    small = SceneDownloader(chunk_size=16 * 1024, max_bytes=100 * 1024, timeout=5, retries=0)
+    for path in ("/video", "/unsized"):
+        dest = os.path.join(work_dir, f"big{path.replace('/', '_')}.mp4")
+        try:
+            small.download(f"{base_url}{path}", dest)
+            raise AssertionError(f"{path} exceeded max_bytes without an error")
+        except DownloadError as e:
+            print(f"Size limit ({path}): {e}")
+        assert not os.path.exists(dest) and not os.path.exists(dest + ".part")
+
+    # 5. Failed connections and 5xx responses are each retried in one place only
+    for path in ("/drop", "/busy"):
+        requests_seen.clear()
+        try:
+            downloader.download(f"{base_url}{path}", os.path.join(work_dir, "dead.mp4"))
+            raise AssertionError(f"{path} did not fail")
+        except DownloadError as e:
+            print(f"Retries ({path}): {len(requests_seen)} requests, {e}")
+        assert len(requests_seen) == downloader.retries + 1
+
+    # 6. A checksum mismatch discards the download
+    dest = os.path.join(work_dir, "corrupt.mp4")
+    try:
+        downloader.download(f"{base_url}/video", dest, expected_sha256="0" * 64)
+        raise AssertionError("checksum mismatch was not detected")
+    except DownloadError as e:
+        print(f"Checksum: {e}")
+    assert not os.path.exists(dest) and not os.path.exists(dest + ".part")
+
+
+if __name__ == "__main__":
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    work_dir = tempfile.mkdtemp(prefix="verify_downloader_")
+    try:
+        test_downloader(f"http://127.0.0.1:{server.server_address[1]}", work_dir)
+        print("\nDOWNLOADER VERIFICATION PASSED")
+    except AssertionError as e:
+        print(f"\nDOWNLOADER VERIFICATION FAILED: {e}")
+        exit(1)
+    except Exception as e:
+        print(f"\nERROR: {type(e).__name__}: {e}")
+        exit(1)
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,105 @@
+import shutil
+import time
+from concurrent.futures import CancelledError
+from jobs import JobManager
+from providers import FakeProvider, ProviderRunner, ProviderError
+
+URL = "https://example.com/scene.mp4"
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def test_provider_runner():
+    print("\n--- Testing ProviderRunner ---")
+    runner = ProviderRunner({"fake": 1}, poll_initial=0.05, poll_max=0.1, timeout=5)
+    provider = FakeProvider(URL, render_seconds=0.3)
+
+    # 1. A render resolves to the provider's URL
+    assert runner.generate("fake", provider, "a cat").result(timeout=5) == URL
+    print("Render succeeded")
+
+    # 2. Failed renders raise ProviderError
+    try:
+        runner.generate("fake", FakeProvider(URL, render_seconds=0, fail=True), "a dog").result(timeout=5)
+        raise AssertionError("failed render did not raise")
+    except ProviderError as e:
+        print(f"Failed render raised: {e}")
+
+    # 3. The tier limit queues the second render until the first finishes
+    first = runner.generate("fake", provider, "one")
+    second = runner.generate("fake", provider, "two")
+    assert wait_for(lambda: runner.stats()["waiting"].get("fake") == 1)
+    print(f"Stats with one queued: {runner.stats()}")
+    assert runner.stats()["in_flight"]["fake"] == 1
+    assert first.result(timeout=5) == URL and second.result(timeout=5) == URL
+    assert runner.stats()["in_flight"]["fake"] == 0 and runner.stats()["waiting"]["fake"] == 0
+
+    # 4. Cancelling the future cancels the remote render
+    slow = FakeProvider(URL, render_seconds=30)
+    future = runner.generate("fake", slow, "slow")
+    assert wait_for(lambda: slow.submitted)
+    future.cancel()
+    assert wait_for(lambda: slow.cancelled), "provider render was not cancelled"
+    print(f"Cancelled provider handles: {len(slow.cancelled)}")
+    # The slot is freed for the next render
+    assert runner.generate("fake", provider, "after").result(timeout=5) == URL
+
+
+def test_job_cancel():
+    print("\n--- Testing JobManager cancel ---")
+    runner = ProviderRunner({"fake": 2}, poll_initial=0.05, poll_max=0.1, timeout=60)
+    provider = FakeProvider(URL, render_seconds=30)
+    jobs = JobManager(max_workers=1, queue_limit=5)
+
+    def render(job):
+        # Like RenderPipeline: provider futures are cancelled with the job
+        futures = [runner.generate("fake", provider, f"scene {i}") for i in range(2)]
+        for future in futures:
+            job.on_cancel(future.cancel)
+        return [future.result() for future in futures]
+
+    try:
+        running = jobs.submit(render)
+        queued = jobs.submit(render)
+        assert wait_for(lambda: running.status == "running" and len(provider.submitted) == 2)
+
+        # 1. A queued job never starts
+        jobs.cancel(queued.id)
+        print(f"Queued job: {queued.status}")
+        assert queued.status == "cancelled"
+
+        # 2. A running job stops and its provider renders are cancelled
+        jobs.cancel(running.id)
+        assert wait_for(lambda: running.done)
+        print(f"Running job: {running.status}, cancelled provider handles: {len(provider.cancelled)}")
+        assert running.status == "cancelled"
+        assert wait_for(lambda: len(provider.cancelled) == 2)
+        assert [e["event"] for e in running.events][-1] == "job_cancelled"
+        try:
+            queued.future.result(timeout=1)
+            raise AssertionError("queued job ran")
+        except CancelledError:
+            pass
+    finally:
+        for job in jobs.list():
+            shutil.rmtree(job.workspace, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    try:
+        test_provider_runner()
+        test_job_cancel()
+        print("\nJOBS VERIFICATION PASSED")
+    except AssertionError as e:
+        print(f"\nJOBS VERIFICATION FAILED: {e}")
+        exit(1)
+    except Exception as e:
+        print(f"\nERROR: {type(e).__name__}: {e}")
+        exit(1)
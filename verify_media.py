@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+
+# Serve a scratch directory with a cache inside it, to check the cache is never exposed
+MEDIA_DIR = tempfile.mkdtemp(prefix="verify_media_")
+os.environ["CACHE_DIR"] = os.path.join(MEDIA_DIR, "cache")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from media_files import MediaFiles
+
+DATA = bytes(range(256)) * 40  # 10240 bytes
+HASHED = "viral_T_x.0123456789ab.mp4"
+UNHASHED = "scene_0.mp4"
+
+
+def test_media_files():
+    print("\n--- Testing /output media serving ---")
+    for name in (HASHED, UNHASHED, os.path.join("cache", "speech.mp3")):
+        os.makedirs(os.path.dirname(os.path.join(MEDIA_DIR, name)), exist_ok=True)
+        with open(os.path.join(MEDIA_DIR, name), "wb") as f:
+            f.write(DATA)
+    app = FastAPI()
+    app.mount("/output", MediaFiles(directory=MEDIA_DIR), name="output")
+    client = TestClient(app)
+
+    # 1. Full response with validators and caching policy
+    response = client.get(f"/output/{HASHED}")
+    print(f"GET {HASHED}: {response.status_code} {response.headers['cache-control']}")
+    assert response.status_code == 200 and response.content == DATA
+    assert response.headers["accept-ranges"] == "bytes"
+    assert "immutable" in response.headers["cache-control"]
+    etag = response.headers["etag"]
+    response = client.get(f"/output/{UNHASHED}")
+    print(f"GET {UNHASHED}: {response.status_code} {response.headers['cache-control']}")
+    assert response.headers["cache-control"] == "no-cache"
+
+    # 2. Byte ranges (seeking in the player)
+    response = client.get(f"/output/{HASHED}", headers={"Range": "bytes=100-199"})
+    print(f"Range 100-199: {response.status_code} {response.headers.get('content-range')}")
+    assert response.status_code == 206 and response.content == DATA[100:200]
+    assert response.headers["content-range"] == f"bytes 100-199/{len(DATA)}"
+    response = client.get(f"/output/{HASHED}", headers={"Range": "bytes=-10"})
+    assert response.status_code == 206 and response.content == DATA[-10:]
+
+    # 3. Unsatisfiable range
+    response = client.get(f"/output/{HASHED}", headers={"Range": f"bytes={len(DATA)}-"})
+    print(f"Range past the end: {response.status_code} {response.headers.get('content-range')}")
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(DATA)}"
+
+    # 4. Revalidation costs a 304, not a download
+    response = client.get(f"/output/{HASHED}", headers={"If-None-Match": etag})
+    print(f"If-None-Match: {response.status_code}")
+    assert response.status_code == 304 and not response.content
+
+    # 5. If-Range with a stale validator sends the whole file
+    response = client.get(f"/output/{HASHED}", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    print(f"If-Range stale: {response.status_code}")
+    assert response.status_code == 200 and response.content == DATA
+
+    # 6. The server-side cache is not served, even inside the mount
+    response = client.get("/output/cache/speech.mp3")
+    print(f"GET cache/speech.mp3: {response.status_code}")
+    assert response.status_code == 404
+
+
+if __name__ == "__main__":
+    try:
+        test_media_files()
+        print("\nMEDIA VERIFICATION PASSED")
+    except AssertionError as e:
+        print(f"\nMEDIA VERIFICATION FAILED: {e}")
+        exit(1)
+    except Exception as e:
+        print(f"\nERROR: {type(e).__name__}: {e}")
+        exit(1)
+    finally:
+        shutil.rmtree(MEDIA_DIR, ignore_errors=True)
@@ -0,0 +1,118 @@
+import json
+import re
+from types import SimpleNamespace
+from prompt_factory import PromptFactory
+
+TOPICS = ["Bitcoin ATH", "Fed rate cut", "Meme coin rug pull", "Gold rally", "Tesla earnings"]
+
+
+class StubCompletions:
+    """Answers batch requests with a canned "prompts" payload and single requests per topic."""
+
+    def __init__(self, batch):
+        self.batch = batch  # payload dict, raw string, or an exception to raise
+        self.batch_calls = 0
+        self.single_topics = []
+
+    def create(self, model, messages, **kwargs):
+        user_prompt = messages[-1]["content"]
+        if '"prompts" array' in user_prompt:
+            self.batch_calls += 1
+            if isinstance(self.batch, Exception):
+                raise self.batch
+            content = self.batch if isinstance(self.batch, str) else json.dumps(self.batch)
+        else:
+            topic = re.search(r"about: (.+)", user_prompt).group(1).strip()
+            self.single_topics.append(topic)
+            content = json.dumps({"id": "single", "hook": f"single {topic}", "prompt": f"single prompt {topic}",
+                                  "cta_overlay": "", "style_notes": "single"})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def factory_with(batch):
+    factory = PromptFactory()
+    completions = StubCompletions(batch)
+    factory.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return factory, completions
+
+
+def item(index, name, **extra):
+    return {"index": index, "id": f"id-{name}", "hook": f"hook {name}", "prompt": f"prompt {name}", **extra}
+
+
+def test_mapping():
+    print("\n--- Testing batch-to-topic mapping ---")
+    batch = {"prompts": [
+        item(3, "three"),                       # out of order
+        item(1, "one"),
+        item(1, "duplicate"),                   # second claim on slot 1 is ignored
+        "not an object",                        # skipped
+        item(99, "five"),                       # bad index: placed by position (5th)
+        {"index": 4, "hook": "no prompt"},      # invalid: falls back to a single request
+        item(6, "extra"),                       # beyond the batch: ignored
+    ]}                                          # topic 2 is missing: falls back too
+    items = [(topic, i % 2 == 0) for i, topic in enumerate(TOPICS)]
+
+    factory, completions = factory_with(batch)
+    prompts = factory.create_video_prompts(items)
+    hooks = [p.hook for p in prompts]
+    print(f"Video hooks: {hooks}")
+    print(f"Single fallbacks: {completions.single_topics}")
+    assert [p.topic for p in prompts] == TOPICS
+    assert hooks == ["hook one", f"single {TOPICS[1]}", "hook three", f"single {TOPICS[3]}", "hook five"]
+    assert completions.batch_calls == 1
+    assert completions.single_topics == [TOPICS[1], TOPICS[3]]
+
+    factory, completions = factory_with(batch)
+    prompts = factory.create_image_prompts(items)
+    print(f"Image hooks: {[p.hook for p in prompts]}")
+    assert [p.topic for p in prompts] == TOPICS
+    assert [p.hook for p in prompts][::2] == ["hook one", "hook three", "hook five"]
+    assert completions.single_topics == [TOPICS[1], TOPICS[3]]
+
+    factory, completions = factory_with(batch)
+    prompts = factory.create_kai_prompts(TOPICS)
+    print(f"Kai hooks: {[p.hook for p in prompts]}")
+    assert [p.topic for p in prompts] == TOPICS
+    assert [p.hook for p in prompts][::2] == ["hook one", "hook three", "hook five"]
+    assert completions.single_topics == [TOPICS[1], TOPICS[3]]
+
+
+def test_unusable_batches():
+    print("\n--- Testing unusable batch responses ---")
+    items = [(topic, False) for topic in TOPICS[:3]]
+    for label, batch in (
+        ("request error", RuntimeError("rate limited")),
+        ("invalid JSON", "{not json"),
+        ("no prompts key", {"items": [item(1, "one")]}),
+        ("empty list", {"prompts": []}),
+    ):
+        factory, completions = factory_with(batch)
+        prompts = factory.create_video_prompts(items)
+        print(f"{label}: {len(completions.single_topics)} single fallbacks")
+        assert [p.topic for p in prompts] == TOPICS[:3]
+        assert completions.single_topics == TOPICS[:3]
+
+    # Index-less items are placed by position
+    factory, completions = factory_with({"prompts": [
+        {k: v for k, v in item(None, name).items() if k != "index"} for name in ("a", "b", "c")
+    ]})
+    prompts = factory.create_video_prompts(items)
+    assert [p.hook for p in prompts] == ["hook a", "hook b", "hook c"] and not completions.single_topics
+
+    # Empty input makes no request
+    factory, completions = factory_with({"prompts": []})
+    assert factory.create_video_prompts([]) == [] and completions.batch_calls == 0
+
+
+if __name__ == "__main__":
+    try:
+        test_mapping()
+        test_unusable_batches()
+        print("\nPROMPT BATCH VERIFICATION PASSED")
+    except AssertionError as e:
+        print(f"\nPROMPT BATCH VERIFICATION FAILED: {e}")
+        exit(1)
+    except Exception as e:
+        print(f"\nERROR: {type(e).__name__}: {e}")
+        exit(1)
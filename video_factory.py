@@ -1,14 +1,19 @@
-import os
-import time
-import replicate
+from providers import ProviderRunner, ReplicateProvider, FakeProvider
 try:
     import google.generativeai as genai
 except ImportError:
     genai = None
-from config import REPLICATE_API_TOKEN, GOOGLE_API_KEY
+from config import REPLICATE_API_TOKEN, GOOGLE_API_KEY, SCENE_CONCURRENCY
 
 class VideoProvider:
-    def __init__(self):
+    # Model behind each tier; part of the scene cache key
+    MODELS = {
+        "budget": "minimax/video-01",
+        "veo-2": "veo-2",
+        "sora-2": "sora-2",
+    }
+
+    def __init__(self, providers=None):
         self.replicate_token = REPLICATE_API_TOKEN
         # Initialize Google AI if key exists
         if GOOGLE_API_KEY and genai:
@@ -17,73 +22,56 @@ class VideoProvider:
         else:
             self.has_google = False
 
-    def generate_video(self, prompt, model_tier="budget"):
-        """
-        Generates a video based on the prompt and selected tier.
-        Returns the URL or path to the generated video.
-        """
-        print(f"Generating video with tier: {model_tier} for prompt: {prompt}")
+        # tier -> Provider; pass FakeProviders to run without credentials (tests)
+        self.providers = providers or self._default_providers()
+        # Renders run as coroutines, limited per tier so concurrent requests share the provider's limit
+        self.runner = ProviderRunner(SCENE_CONCURRENCY)
 
-        if model_tier == "sora-2":
-            return self._generate_sora(prompt)
-        elif model_tier == "veo-2":
-            return self._generate_veo(prompt)
+    def _default_providers(self):
+        if self.replicate_token:
+            # Replicate (Minimax/Kling/Hailuo) implementation
+            budget = ReplicateProvider(self.MODELS["budget"], self.replicate_token)
         else:
-            return self._generate_budget(prompt)
+            print("Warning: REPLICATE_API_TOKEN not set. Budget tier uses mock renders.")
+            budget = FakeProvider("https://replicate.delivery/pbxt/mock_video.mp4", name="budget-mock")
 
-    def _generate_sora(self, prompt):
-        # Hypothetical OpenAI Sora 2 implementation
-        # client.videos.generate(model="sora-2", prompt=prompt)
-        print("Using OpenAI Sora 2 (Hypothetical)...")
-        # Mock response for now as API is not public
-        time.sleep(2) 
-        return "https://example.com/sora_video_mock.mp4"
+        # Google Veo 2 via Gemini: the public API isn't available yet, so renders are simulated
+        if self.has_google:
+            veo = FakeProvider("https://storage.googleapis.com/gtv-videos-bucket/sample/TearsOfSteel.mp4",
+                               render_seconds=3, name="veo-2-preview")
+        else:
+            print("Warning: GOOGLE_API_KEY not set or google-generativeai not installed. Veo 2 uses mock renders.")
+            veo = FakeProvider("https://storage.googleapis.com/gtv-videos-bucket/sample/BigBuckBunny.mp4",
+                               name="veo-2-mock")
 
-    def _generate_veo(self, prompt):
-        # Google Veo 2 implementation via Gemini API
-        print("Using Google Veo 2 (Gemini)...")
-        
-        if not self.has_google:
-            print("Warning: GOOGLE_API_KEY not set or google-generativeai not installed. Using mock.")
-            time.sleep(2)
-            return "https://storage.googleapis.com/gtv-videos-bucket/sample/BigBuckBunny.mp4" # Mock
+        # Hypothetical OpenAI Sora 2 implementation (API is not public)
+        sora = FakeProvider("https://example.com/sora_video_mock.mp4", name="sora-2-mock")
+        return {"budget": budget, "veo-2": veo, "sora-2": sora}
 
-        try:
-            # Note: This is a hypothetical implementation as Veo 2 public API details 
-            # might vary. Adjusting to standard Gemini content generation pattern.
-            # model = genai.GenerativeModel('veo-2') 
-            # response = model.generate_content(prompt)
-            # return response.video_url
-            
-            # For now, we'll simulate the call since Veo 2 might be in preview
-            time.sleep(3)
-            return "https://storage.googleapis.com/gtv-videos-bucket/sample/TearsOfSteel.mp4"
-            
-        except Exception as e:
-            print(f"Error generating video with Google Veo 2: {e}")
-            return "https://storage.googleapis.com/gtv-videos-bucket/sample/BigBuckBunny.mp4"
+    def model_for(self, model_tier="budget"):
+        return self.MODELS.get(model_tier, self.MODELS["budget"])
 
-    def _generate_budget(self, prompt):
-        # Replicate (Minimax/Kling/Hailuo) implementation
-        print("Using Budget Tier (Replicate)...")
-        
-        if not self.replicate_token:
-             print("Warning: REPLICATE_API_TOKEN not set. Using mock.")
-             time.sleep(2)
-             return "https://replicate.delivery/pbxt/mock_video.mp4"
+    def concurrency_limit(self, model_tier="budget"):
+        """Max number of scenes rendered in parallel for a tier."""
+        return max(1, SCENE_CONCURRENCY.get(model_tier, SCENE_CONCURRENCY["budget"]))
 
-        try:
-            # Using Minimax model as an example
-            output = replicate.run(
-                "minimax/video-01",
-                input={"prompt": prompt}
-            )
-            # Replicate usually returns a URL or a list of URLs
-            video_url = output if isinstance(output, str) else output[0]
-            return video_url
-        except Exception as e:
-            print(f"Error generating video with Replicate: {e}")
-            return "https://replicate.delivery/pbxt/mock_video.mp4"
+    def submit_video(self, prompt, model_tier="budget"):
+        """
+        Starts a render for the prompt on the selected tier without blocking.
+        Returns a concurrent.futures.Future for the video URL; it raises ProviderError
+        on failure, and cancelling it cancels the remote render.
+        """
+        tier = model_tier if model_tier in self.providers else "budget"
+        print(f"Generating video with tier: {tier} for prompt: {prompt}")
+        return self.runner.generate(tier, self.providers[tier], prompt)
+
+    def generate_video(self, prompt, model_tier="budget"):
+        """
+        Generates a video based on the prompt and selected tier.
+        Returns the URL or path to the generated video.
+        Blocks until the render finishes (queued while the tier is at its concurrency limit).
+        """
+        return self.submit_video(prompt, model_tier).result()
 
 if __name__ == "__main__":
     provider = VideoProvider()